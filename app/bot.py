@@ -1,13 +1,16 @@
+from telegram import Update
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
     ConversationHandler,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
 from app.config import settings
+from app.middleware.rate_limit import enforce_rate_limit
 from app.handlers import (
     admin,
     browse,
@@ -57,6 +60,9 @@ def create_application():
         per_message=False,
     )
 
+    # Rate limiting runs before every other handler and stops floods early
+    application.add_handler(TypeHandler(Update, enforce_rate_limit), group=-1)
+
     # /start and /help
     application.add_handler(CommandHandler("start", start.start_command))
     application.add_handler(CommandHandler("help", help.help_command))
@@ -75,6 +81,7 @@ def create_application():
     application.add_handler(CommandHandler("trending", browse.trending_events))
     application.add_handler(CommandHandler("find", find.find_command))
     application.add_handler(CommandHandler("newslettertime", newslettertime.newslettertime_command))
+    application.add_handler(CommandHandler("reminders", remind.reminders_command))
     application.add_handler(CommandHandler("delete", admin.delete_event_command))
 
     # Moderation panel
@@ -92,5 +99,6 @@ def create_application():
     application.add_handler(CallbackQueryHandler(remind.handle_remind_button, pattern=r"^remind:"))
     application.add_handler(CallbackQueryHandler(moderation.handle_moderation_callback, pattern=r"^mod:"))
     application.add_handler(CallbackQueryHandler(help.handle_help_callback, pattern=r"^help:"))
+    application.add_handler(CallbackQueryHandler(find.handle_find_page, pattern=r"^find:"))
 
     return application
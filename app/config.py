@@ -15,6 +15,29 @@ class Settings(BaseSettings):
     SUPABASE_PUBLISHABLE_KEY: str
     GEMINI_API_KEY: str
 
+    # Gemini extraction: max concurrent calls and per-call timeout
+    GEMINI_MAX_CONCURRENCY: int = 4
+    GEMINI_TIMEOUT_SECONDS: float = 30.0
+
+    # Extraction cache: results reused for repeat posts of the same text/poster
+    EXTRACTION_CACHE_TTL_HOURS: float = 72.0
+    EXTRACTION_CACHE_SIZE: int = 512
+
+    # Duplicate detection: how far back reposts are matched before parsing
+    DEDUP_WINDOW_DAYS: int = 30
+
+    # Poster pipeline: background upload workers and transcoding (0 disables either step)
+    MEDIA_WORKERS: int = 2
+    MEDIA_QUEUE_SIZE: int = 100
+    POSTER_MAX_DIMENSION: int = 1600
+    POSTER_WEBP_QUALITY: int = 80
+
+    # Newsletter/digest broadcasts: concurrent senders (global 30 msg/s cap still applies)
+    BROADCAST_WORKERS: int = 8
+
+    # Reminder offsets (minutes before the event) for accounts that haven't set their own
+    REMINDER_OFFSETS_MINUTES: list[int] = [1440, 60]
+
     class Config:
         env_file = ".env.local"
         extra = "ignore"
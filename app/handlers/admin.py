@@ -1,10 +1,9 @@
-from datetime import datetime
-
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from app.config import SGT
-from app.services.supabase_client import is_verified_admin_by_tele_id, supabase
+from app.services.event_hooks import on_event_deleted
+from app.services.supabase_client import soft_delete_event
+from app.services.user_service import get_verified_account
 
 
 async def delete_event_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -16,19 +15,14 @@ async def delete_event_command(update: Update, context: ContextTypes.DEFAULT_TYP
     event_id = context.args[0]
     user = update.effective_user
 
-    if not is_verified_admin_by_tele_id(user.id):
+    if not await get_verified_account(user.id):
         await update.message.reply_text("Only verified admins can delete events.")
         return
 
     # Soft delete
-    result = (
-        supabase.table("events")
-        .update({"is_deleted": True, "deleted_at": datetime.now(SGT).isoformat()})
-        .eq("event_id", event_id)
-        .execute()
-    )
-
-    if result.data:
+    cancelled = await soft_delete_event(event_id)
+    if cancelled is not None:
+        on_event_deleted(event_id, cancelled)
         await update.message.reply_text(f"✅ Event deleted.")
     else:
         await update.message.reply_text("Event not found.")
@@ -4,7 +4,8 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
 from app.services.event_card import send_event_card
-from app.services.supabase_client import get_event, update_event
+from app.services.event_hooks import on_event_rescheduled, on_event_updated
+from app.services.supabase_client import get_event, update_event, update_event_date
 from app.services.user_service import VERIFY_MSG, get_verified_account
 
 logger = logging.getLogger(__name__)
@@ -51,7 +52,7 @@ def _current_values_text(event: dict) -> str:
 
 async def edit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Entry point: /edit <event_id>"""
-    account = get_verified_account(update.effective_user.id)
+    account = await get_verified_account(update.effective_user.id)
     if not account:
         await update.message.reply_text(VERIFY_MSG)
         return ConversationHandler.END
@@ -61,7 +62,7 @@ async def edit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         return ConversationHandler.END
 
     event_id = context.args[0]
-    event = get_event(event_id)
+    event = await get_event(event_id)
     if not event or event.get("is_deleted"):
         await update.message.reply_text("Event not found.")
         return ConversationHandler.END
@@ -85,7 +86,7 @@ async def start_edit_from_callback(
     account: dict,
 ) -> int:
     """Entry point triggered from the /manage moderation panel."""
-    event = get_event(event_id)
+    event = await get_event(event_id)
     if not event or event.get("is_deleted"):
         await update.callback_query.edit_message_text("Event not found.")
         return ConversationHandler.END
@@ -115,7 +116,7 @@ async def choose_field(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         context.user_data.pop("edit_field", None)
         await query.edit_message_text("Edits saved.")
         if event_id:
-            event = get_event(event_id)
+            event = await get_event(event_id)
             if event:
                 await send_event_card(query.get_bot(), query.message.chat_id, event)
         return ConversationHandler.END
@@ -149,13 +150,19 @@ async def enter_value(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     new_value = update.message.text.strip()
 
     try:
-        update_event(event_id, **{db_column: new_value})
+        if db_column == "date":
+            # Moves the event's pending reminders in the same transaction
+            change = await update_event_date(event_id, new_value)
+            if change:
+                on_event_rescheduled(change["event"], change["cancelled"], change["scheduled"])
+        else:
+            on_event_updated(await update_event(event_id, **{db_column: new_value}))
     except Exception as e:
         logger.error("Failed to update event %s field %s: %s", event_id, db_column, e)
         await update.message.reply_text("Failed to save. Please try again.")
         return ENTER_VALUE
 
-    event = get_event(event_id)
+    event = await get_event(event_id)
     if not event:
         await update.message.reply_text("Event updated but could not reload it.")
         return ConversationHandler.END
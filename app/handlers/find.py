@@ -1,16 +1,27 @@
 import re
+import uuid
 
-from telegram import Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
-from app.services.event_card import send_event_card
-from app.services.supabase_client import search_events
+from app.services import search_index
+from app.services.event_card import send_event_cards
+from app.services.supabase_client import (
+    advance_find_session,
+    create_find_session,
+    get_find_session,
+    search_events,
+)
 from app.services.user_service import VERIFY_MSG, get_verified_account
 
+PAGE_SIZE = 5
+# Upcoming matches taken from the in-process index before handing over to SQL
+LOCAL_RESULT_LIMIT = 50
+
 
 async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Search events by category tag or keyword."""
-    if not get_verified_account(update.effective_user.id):
+    if not await get_verified_account(update.effective_user.id):
         await update.message.reply_text(VERIFY_MSG)
         return
 
@@ -26,15 +37,124 @@ async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Check if searching by category hashtag
     category_match = re.match(r"^#(\w+)$", query_text)
+    # Persisted in find_sessions once there is a next page, so any replica can serve it
+    search = {
+        "token": uuid.uuid4().hex[:16],
+        "tele_id": update.effective_user.id,
+        "query": None,
+        "category": None,
+        # Upcoming matches are served from memory; past and deeper results from SQL
+        "source": "sql",
+        "used_local": False,
+        "local_offset": 0,
+        "after_rank": None,
+        "after_id": None,
+        "page": 0,
+    }
     if category_match:
-        events = search_events(category=category_match.group(1))
+        search["category"] = category_match.group(1)
+    else:
+        search["query"] = query_text
+    if search_index.is_ready() and _local_ids(search):
+        search["source"] = "local"
+        search["used_local"] = True
+
+    await _send_page(update, context, search, first=True)
+
+
+async def handle_find_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle callback_data like 'find:<token>:<page>' (the "Next page" button)."""
+    query = update.callback_query
+    parts = query.data.split(":")
+    search = await get_find_session(parts[1]) if len(parts) == 3 else None
+    if not search or search["tele_id"] != query.from_user.id or str(search["page"]) != parts[2]:
+        await query.answer("This search has expired. Run /find again.", show_alert=True)
+        return
+    await query.answer()
+
+    try:
+        await query.edit_message_reply_markup(reply_markup=None)
+    except Exception:
+        pass
+    await _send_page(update, context, search, first=False)
+
+
+async def _send_page(update: Update, context: ContextTypes.DEFAULT_TYPE, search: dict, first: bool):
+    chat_id = update.effective_chat.id
+    if search["source"] == "local" and not search_index.is_ready():
+        search["source"] = "sql"  # Tap reached a replica whose index is still loading
+    if search["source"] == "local":
+        page, has_more, intro = _local_page(search)
+        next_label = "Next page ▶"
+        if not has_more:
+            # Upcoming matches exhausted; offer the full (including past events) search
+            search["source"] = "sql"
+            has_more, next_label = True, "Search past events ▶"
     else:
-        events = search_events(query=query_text)
+        page, has_more = await _sql_page(search)
+        intro = f"Found {PAGE_SIZE}+ event(s):" if has_more else f"Found {len(page)} event(s):"
+        next_label = "Next page ▶"
+
+    search["page"] += 1
+    if not first:
+        if not await advance_find_session(search, search["page"] - 1):
+            return  # A concurrent tap on the same button already sent this page
+    elif has_more and page:
+        await create_find_session(search)
 
-    if not events:
-        await update.message.reply_text("No matching events found.")
+    if not page:
+        text = "No matching events found." if first else "No more results."
+        await context.bot.send_message(chat_id=chat_id, text=text)
         return
 
-    await update.message.reply_text(f"Found {len(events)} event(s):")
-    for event in events:
-        await send_event_card(context.bot, update.effective_chat.id, event)
+    if first:
+        await context.bot.send_message(chat_id=chat_id, text=intro)
+    await send_event_cards(context.bot, chat_id, page)
+
+    if has_more:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="More results available.",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton(next_label, callback_data=f"find:{search['token']}:{search['page']}")]
+            ]),
+        )
+
+
+def _local_ids(search: dict) -> list[str]:
+    return search_index.index.search(search["query"], search["category"], LOCAL_RESULT_LIMIT)
+
+
+def _local_page(search: dict) -> tuple[list[dict], bool, str]:
+    # Re-run on every page: the index is in memory, and this replica may not be the one that served the last page
+    local_ids = _local_ids(search)
+    ids = local_ids[search["local_offset"]:search["local_offset"] + PAGE_SIZE]
+    search["local_offset"] += len(ids)
+    page = [e for e in (search_index.index.get(i) for i in ids) if e]
+    total = len(local_ids)
+    count = f"{total}+" if total >= LOCAL_RESULT_LIMIT else str(total)
+    return page, search["local_offset"] < total, f"Found {count} upcoming event(s):"
+
+
+async def _sql_page(search: dict) -> tuple[list[dict], bool]:
+    # Events already shown from the local index are skipped, so a page may need a refill
+    seen = set(_local_ids(search)) if search["used_local"] and search_index.is_ready() else set()
+    page: list[dict] = []
+    has_more = True
+    while has_more and len(page) < PAGE_SIZE:
+        # One extra row tells us whether there is a next page
+        rows = await search_events(
+            query=search["query"],
+            category=search["category"],
+            limit=PAGE_SIZE + 1,
+            after=(search["after_rank"], search["after_id"]) if search["after_id"] else None,
+        )
+        has_more = len(rows) > PAGE_SIZE
+        for row in rows[:PAGE_SIZE]:
+            if len(page) == PAGE_SIZE:
+                has_more = True
+                break
+            search["after_rank"], search["after_id"] = row["rank"], row["event"]["event_id"]
+            if row["event"]["event_id"] not in seen:
+                page.append(row["event"])
+    return page, has_more
@@ -50,10 +50,11 @@ _SECTIONS = {
     "search": {
         "text": (
             "🔍 *Searching Events*\n\n"
-            "*/find \\<keyword\\>* — full\\-text search\\.\n"
+            "*/find \\<keyword\\>* — full\\-text search, best matches first \\(small typos are OK\\)\\.\n"
             "_Example:_ /find hackathon\n\n"
             "*/find \\#category* — filter by category\\.\n"
             "_Example:_ /find \\#sports\n\n"
+            "Results come 5 at a time; tap *Next page ▶* for more\\.\n"
             "Categories are created automatically when events are posted\\."
         ),
     },
@@ -62,8 +63,9 @@ _SECTIONS = {
             "🙋 *RSVP & Reminders*\n\n"
             "*RSVP* — tap *RSVP 🙋 \\(N\\)* on any event card to mark yourself as "
             "attending\\. Tap again to cancel\\.\n\n"
-            "*Remind Me* — tap *⏰ Remind Me* to get a DM 24h and 1h before the event\\. "
-            "Reminders are also created automatically when you RSVP\\.\n\n"
+            "*Remind Me* — tap *⏰ Remind Me* to get a DM 24h and 1h before the event by default\\. "
+            "Reminders are also created automatically when you RSVP\\.\n"
+            "Change the timing with: /reminders 2d 3h \\(or /reminders default\\)\n\n"
             "*Add to Calendar* — tap *📅 Add to Calendar* to open Google Calendar "
             "with the event pre\\-filled\\.\n\n"
             "*Share* — tap *🔗 Share* to get a deep link you can forward to friends\\."
@@ -118,6 +120,7 @@ _SECTIONS = {
             "/find \\<query\\> — search by keyword or \\#category\n"
             "/subscribe — manage category subscriptions\n"
             "/newslettertime HH:MM — set daily digest time \\(SGT\\)\n"
+            "/reminders 24h 1h — set when reminders arrive\n"
             "/manage — view, edit, delete your posts\n"
             "/edit \\<event\\_id\\> — edit an event\n"
             "/delete \\<event\\_id\\> — delete an event\n"
@@ -4,8 +4,8 @@ from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from app.config import SGT
-from app.services.supabase_client import get_events_by_account, supabase
+from app.services.event_hooks import on_event_deleted
+from app.services.supabase_client import get_event, get_events_by_account, soft_delete_event
 from app.services.user_service import VERIFY_MSG, get_verified_account
 
 logger = logging.getLogger(__name__)
@@ -26,12 +26,12 @@ def _event_summary(event: dict) -> str:
 
 async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List the user's own events with Edit and Delete inline buttons."""
-    account = get_verified_account(update.effective_user.id)
+    account = await get_verified_account(update.effective_user.id)
     if not account:
         await update.message.reply_text(VERIFY_MSG)
         return
 
-    events = get_events_by_account(account["account_id"], limit=10)
+    events = await get_events_by_account(account["account_id"], limit=10)
     if not events:
         await update.message.reply_text(
             "You haven't posted any events yet.\n"
@@ -66,7 +66,7 @@ async def handle_moderation_callback(update: Update, context: ContextTypes.DEFAU
 
     _, action, event_id = parts
 
-    account = get_verified_account(query.from_user.id)
+    account = await get_verified_account(query.from_user.id)
     if not account:
         await query.answer(VERIFY_MSG, show_alert=True)
         return
@@ -80,8 +80,7 @@ async def handle_moderation_callback(update: Update, context: ContextTypes.DEFAU
 
     if action == "delete":
         # Show confirmation
-        result = supabase.table("events").select("title, text").eq("event_id", event_id).maybe_single().execute()
-        event = result.data
+        event = await get_event(event_id)
         if not event:
             await query.edit_message_text("Event not found.")
             return
@@ -100,15 +99,15 @@ async def handle_moderation_callback(update: Update, context: ContextTypes.DEFAU
 
     if action == "confirm":
         # Verify ownership before deleting
-        result = supabase.table("events").select("fk_account_id").eq("event_id", event_id).maybe_single().execute()
-        event = result.data
+        event = await get_event(event_id)
         if not event or event.get("fk_account_id") != account["account_id"]:
             await query.edit_message_text("You can only delete your own events.")
             return
-        supabase.table("events").update({
-            "is_deleted": True,
-            "deleted_at": datetime.now(SGT).isoformat(),
-        }).eq("event_id", event_id).execute()
+        cancelled = await soft_delete_event(event_id)
+        if cancelled is None:
+            await query.edit_message_text("Event not found.")
+            return
+        on_event_deleted(event_id, cancelled)
         await query.edit_message_text("Event deleted.")
         logger.info("Event %s soft-deleted by account %s", event_id, account["account_id"])
         return
@@ -8,7 +8,7 @@ from app.services.user_service import VERIFY_MSG, get_verified_account, update_n
 
 async def newslettertime_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Set preferred newsletter time. Usage: /newslettertime HH:MM"""
-    account = get_verified_account(update.effective_user.id)
+    account = await get_verified_account(update.effective_user.id)
     if not account:
         await update.message.reply_text(VERIFY_MSG)
         return
@@ -32,5 +32,5 @@ async def newslettertime_command(update: Update, context: ContextTypes.DEFAULT_T
         await update.message.reply_text("Invalid time. Use 00:00 to 23:59.")
         return
 
-    update_newsletter_time(account["account_id"], time_str + ":00")
+    await update_newsletter_time(account["account_id"], time_str + ":00")
     await update.message.reply_text(f"Newsletter time updated to {time_str} (GMT+08)")
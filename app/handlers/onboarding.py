@@ -2,11 +2,8 @@ import logging
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 
-from app.services.user_service import (
-    get_all_categories,
-    get_account_subscriptions,
-    get_category_subscriber_counts,
-)
+from app.services.categories import all_categories, subscriber_counts
+from app.services.user_service import get_account_subscriptions
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +52,7 @@ async def send_onboarding(bot: Bot, tele_id: int, account_id: str):
         logger.error("Failed to send onboarding welcome to %s: %s", tele_id, e)
         return
 
-    categories = get_all_categories()
+    categories = await all_categories()
     if not categories:
         # No categories yet; just end with a hint
         try:
@@ -67,8 +64,8 @@ async def send_onboarding(bot: Bot, tele_id: int, account_id: str):
             logger.error("Failed to send onboarding category hint to %s: %s", tele_id, e)
         return
 
-    subscribed_ids = {s["fk_category_id"] for s in get_account_subscriptions(account_id)}
-    counts = get_category_subscriber_counts()
+    subscribed_ids = {s["fk_category_id"] for s in await get_account_subscriptions(account_id)}
+    counts = await subscriber_counts()
     keyboard = _build_category_keyboard(categories, subscribed_ids, counts)
 
     try:
@@ -1,46 +1,27 @@
-import hashlib
 import logging
 import re
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from app.middleware.rate_limit import check_rate_limit
+from app.middleware.rate_limit import MAX_POSTS_PER_HOUR
+from app.services.dedup import find_duplicate, text_fingerprint, window_start
 from app.services.gemini import parse_event
-from app.services.supabase_client import (
-    get_account_by_tele_id,
-    get_event_by_hash,
-    get_or_create_category,
-    is_verified_admin_by_tele_id,
-    link_event_category,
-    save_event,
-    save_event_image,
-    update_event_refs,
-    upload_image,
-)
 from app.services.event_card import send_event_card
-from app.services.user_service import get_all_categories
+from app.services.event_hooks import on_event_created
+from app.services.media import enqueue_poster
+from app.services.supabase_client import count_recent_posts, ingest_event
+from app.services.user_service import get_verified_account
 
 logger = logging.getLogger(__name__)
 
 
-def _compute_event_hash(text: str, date: str | None) -> str:
-    """Hash event text + date to detect duplicates."""
-    content = f"{text.strip().lower()}|{date or ''}"
-    return hashlib.sha256(content.encode()).hexdigest()[:32]
+def _extract_tags(text: str) -> list[str]:
+    """Category candidates from subtags like #sports, #ai, in order of appearance.
 
-
-def _extract_category(text: str) -> str:
-    """Extract category from subtags like #sports, #ai, etc."""
-    known_names = {c["name"] for c in get_all_categories()}
-    tags = re.findall(r"#(\w+)", text.lower())
-    for tag in tags:
-        if tag != "unipulse" and tag in known_names:
-            return tag
-    for tag in tags:
-        if tag != "unipulse":
-            return tag
-    return "general"
+    ingest_event picks the first one that is already a known category, else the first tag.
+    """
+    return [tag for tag in re.findall(r"#(\w+)", text.lower()) if tag != "unipulse"]
 
 
 async def handle_event_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -53,68 +34,83 @@ async def handle_event_message(update: Update, context: ContextTypes.DEFAULT_TYP
         return
 
     # Check if poster is a verified user
-    if not is_verified_admin_by_tele_id(user.id):
+    account = await get_verified_account(user.id)
+    if not account:
         await message.reply_text(
             "⚠️ You need to verify as an admin first. DM me with /verify"
         )
         return
 
-    # Fetch account early so we can pass account_id to rate limiter
-    account = get_account_by_tele_id(user.id)
-    account_id = account["account_id"] if account else None
+    logger.info("Processing #unipulse message from @%s in chat %s", user.username, update.effective_chat.id)
 
-    # Rate limiting (DB-backed, persists across restarts)
-    if account_id and not check_rate_limit(account_id):
-        await message.reply_text("⚠️ You've reached the posting limit (5/hour). Please wait before posting more events.")
+    # Deduplication check: runs on the text alone, before any download or LLM call
+    text_hash = text_fingerprint(message.text)
+    duplicate_id = find_duplicate(message.text)
+    if duplicate_id:
+        logger.info("Rejected duplicate of event %s", duplicate_id)
+        await message.reply_text("This event has already been posted!")
         return
 
-    logger.info("Processing #unipulse message from @%s in chat %s", user.username, update.effective_chat.id)
-
-    # Extract category from subtags
-    category_name = _extract_category(message.text)
+    # Cheap pre-check so over-limit posters never cost a download or an LLM call;
+    # ingest_event re-checks under its lock and stays authoritative
+    if await count_recent_posts(account["account_id"]) >= MAX_POSTS_PER_HOUR:
+        await _reply_rate_limited(message)
+        return
 
-    # Download image if present
+    # Poster is only downloaded here if Gemini needs it; otherwise the media worker fetches it
+    photo = message.photo[-1] if message.photo else None  # Highest resolution
     image_bytes = None
-    if message.photo:
-        photo = message.photo[-1]  # Highest resolution
-        file = await photo.get_file()
-        image_bytes = bytes(await file.download_as_bytearray())
+
+    async def load_image() -> bytes:
+        nonlocal image_bytes
+        if image_bytes is None:
+            file = await photo.get_file()
+            image_bytes = bytes(await file.download_as_bytearray())
+        return image_bytes
 
     # Parse event with Gemini (text first, image fallback) to extract date
-    parsed = parse_event(message.text, image_bytes)
+    parsed = await parse_event(message.text, load_image if photo else None)
     logger.info("Parsed event: %s", parsed)
 
-    # Deduplication check
-    text_hash = _compute_event_hash(message.text, parsed.get("date"))
-    if get_event_by_hash(text_hash):
-        await message.reply_text("This event has already been posted!")
-        return
-
-    # Save event to database
-    event = save_event(
+    # Dedup, rate limit (DB-backed, persists across restarts), insert and
+    # categorise in a single transaction
+    result = await ingest_event(
         text=message.text,
+        text_hash=text_hash,
+        account_id=account["account_id"],
+        tags=_extract_tags(message.text),
+        max_posts_per_hour=MAX_POSTS_PER_HOUR,
+        duplicate_since=window_start(),
         date=parsed.get("date"),
-        account_id=account_id,
         title=parsed.get("title"),
         location=parsed.get("location"),
         description=parsed.get("description"),
         end_date=parsed.get("end_date"),
-        text_hash=text_hash,
     )
 
-    event_id = event["event_id"]
+    if result["status"] == "duplicate":
+        await message.reply_text("This event has already been posted!")
+        return
+    if result["status"] == "rate_limited":
+        await _reply_rate_limited(message)
+        return
 
-    # Upload image to storage and save reference
-    if image_bytes:
-        image_url = upload_image(image_bytes)
-        ei = save_event_image(event_id, image_url)
-        update_event_refs(event_id, ei_id=ei["ei_id"])
-        event["image_url"] = image_url
+    event = result["event"]
+    event_id = event["event_id"]
 
-    # Create/link category
-    category = get_or_create_category(category_name)
-    ec = link_event_category(event_id, category["category_id"])
-    update_event_refs(event_id, ec_id=ec["ec_id"])
+    # Card reuses Telegram's copy of the poster; storage upload and the
+    # event_images row are handled by the background media pipeline
+    if photo:
+        event["image_url"] = photo.file_id
+        enqueue_poster(event_id, photo.file_id, image_bytes)
+    on_event_created(event, result["category"])
 
     # Send event card back to the group
     await send_event_card(context.bot, update.effective_chat.id, event)
+
+
+async def _reply_rate_limited(message):
+    await message.reply_text(
+        f"⚠️ You've reached the posting limit ({MAX_POSTS_PER_HOUR}/hour). "
+        "Please wait before posting more events."
+    )
@@ -1,11 +1,19 @@
+import re
 from datetime import datetime, timedelta
+from typing import List, Optional
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from app.config import SGT
-from app.services.supabase_client import supabase, get_event
-from app.services.user_service import VERIFY_MSG, get_verified_account
+from app.config import SGT, settings
+from app.services import reminder_timer
+from app.services.supabase_client import create_reminders, get_event
+from app.services.user_service import VERIFY_MSG, get_verified_account, update_reminder_offsets
+
+MAX_OFFSETS = 4
+MAX_OFFSET_MINUTES = 14 * 24 * 60
+_OFFSET_RE = re.compile(r"^(\d+)([dhm])$")
+_UNIT_MINUTES = {"d": 1440, "h": 60, "m": 1}
 
 
 async def handle_remind_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -18,51 +26,110 @@ async def handle_remind_button(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     _, event_id = parts
 
-    account = get_verified_account(query.from_user.id)
+    account = await get_verified_account(query.from_user.id)
     if not account:
         await query.answer(VERIFY_MSG, show_alert=True)
         return
 
-    event = get_event(event_id)
+    event = await get_event(event_id)
     if not event or not event.get("date"):
         await query.answer("This event has no date set — can't create reminder.", show_alert=True)
         return
 
     event_dt = datetime.fromisoformat(event["date"])
-    created = create_reminders_for_event(account["account_id"], event_id, event_dt)
+    offsets = reminder_offsets(account)
+    created = await create_reminders_for_event(account["account_id"], event_id, event_dt, offsets)
 
     if created:
-        await query.answer("Reminders set for 24h and 1h before the event!", show_alert=True)
+        await query.answer(f"Reminders set for {format_offsets(offsets)} before the event!", show_alert=True)
     else:
         await query.answer("Reminders already set for this event.", show_alert=True)
 
 
-def create_reminders_for_event(account_id: str, event_id: str, event_dt: datetime) -> bool:
-    """Create 24h and 1h reminders for an event. Returns True if any were created."""
-    now = datetime.now(SGT)
-    created_any = False
-
-    for delta in [timedelta(hours=24), timedelta(hours=1)]:
-        remind_at = event_dt - delta
-        if remind_at <= now:
-            continue
-
-        # Check if reminder already exists
-        existing = (
-            supabase.table("reminders")
-            .select("reminder_id")
-            .eq("fk_account_id", account_id)
-            .eq("fk_event_id", event_id)
-            .eq("remind_at", remind_at.isoformat())
-            .maybe_single()
-            .execute()
+async def reminders_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Set reminder offsets. Usage: /reminders 24h 1h, or /reminders default"""
+    account = await get_verified_account(update.effective_user.id)
+    if not account:
+        await update.message.reply_text(VERIFY_MSG)
+        return
+
+    if not context.args:
+        await update.message.reply_text(
+            f"You get reminders {format_offsets(reminder_offsets(account))} before an event.\n\n"
+            "Usage: /reminders <offset> [offset ...] (d, h or m)\n"
+            "Example: /reminders 2d 3h 30m\n"
+            "Reset with: /reminders default"
+        )
+        return
+
+    if context.args == ["default"]:
+        await update_reminder_offsets(account["account_id"], None)
+        await update.message.reply_text(
+            f"Reminders reset to {format_offsets(settings.REMINDER_OFFSETS_MINUTES)} before an event."
+        )
+        return
+
+    minutes = _parse_offsets(context.args)
+    if minutes is None:
+        await update.message.reply_text(
+            f"Please give 1 to {MAX_OFFSETS} offsets of up to 14 days, like 24h, 90m or 2d."
         )
-        if not existing.data:
-            supabase.table("reminders").insert({
-                "fk_account_id": account_id,
-                "fk_event_id": event_id,
-                "remind_at": remind_at.isoformat(),
-            }).execute()
-            created_any = True
-
-    return created_any
+        return
+
+    await update_reminder_offsets(account["account_id"], minutes)
+    await update.message.reply_text(
+        f"Reminders set for {format_offsets(minutes)} before an event. "
+        "This applies to reminders created from now on."
+    )
+
+
+def reminder_offsets(account: dict) -> List[int]:
+    """The account's reminder offsets in minutes, largest first."""
+    return account.get("reminder_offsets") or settings.REMINDER_OFFSETS_MINUTES
+
+
+def format_offsets(minutes: List[int]) -> str:
+    labels = []
+    for m in minutes:
+        if m % 1440 == 0 and m > 1440:
+            labels.append(f"{m // 1440}d")
+        elif m % 60 == 0:
+            labels.append(f"{m // 60}h")
+        else:
+            labels.append(f"{m}m")
+    return labels[0] if len(labels) == 1 else ", ".join(labels[:-1]) + " and " + labels[-1]
+
+
+def _parse_offsets(args: List[str]) -> Optional[List[int]]:
+    minutes = set()
+    for arg in args:
+        match = _OFFSET_RE.match(arg.lower())
+        if not match:
+            return None
+        value = int(match.group(1)) * _UNIT_MINUTES[match.group(2)]
+        if not 0 < value <= MAX_OFFSET_MINUTES:
+            return None
+        minutes.add(value)
+    if len(minutes) > MAX_OFFSETS:
+        return None
+    return sorted(minutes, reverse=True)
+
+
+async def create_reminders_for_event(
+    account_id: str, event_id: str, event_dt: datetime, offsets: Optional[List[int]] = None
+) -> bool:
+    """Create reminders at each offset (minutes) before an event. Returns True if any were created.
+
+    One round-trip: existing reminders are skipped by the unique constraint.
+    """
+    now = datetime.now(SGT)
+    remind_ats = [
+        event_dt - timedelta(minutes=m)
+        for m in (offsets or settings.REMINDER_OFFSETS_MINUTES)
+        if event_dt - timedelta(minutes=m) > now
+    ]
+
+    created = await create_reminders(account_id, event_id, remind_ats)
+    for row in created:
+        reminder_timer.schedule(row["reminder_id"], datetime.fromisoformat(row["remind_at"]))
+    return bool(created)
@@ -7,7 +7,7 @@ from app.services.user_service import get_account_subscriptions, get_verified_ac
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    account = get_verified_account(update.effective_user.id)
+    account = await get_verified_account(update.effective_user.id)
 
     # Handle deep link: /start event_<event_id>
     if context.args and context.args[0].startswith("event_"):
@@ -17,7 +17,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         event_id = context.args[0][6:]  # Strip "event_" prefix
-        event = get_event(event_id)
+        event = await get_event(event_id)
         if event and not event.get("is_deleted"):
             await send_event_card(context.bot, update.effective_chat.id, event)
             return
@@ -26,7 +26,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # First-login detection: no subscriptions and no newsletter ever sent
         is_first_login = (
             not account.get("last_newsletter_sent")
-            and not get_account_subscriptions(account["account_id"])
+            and not await get_account_subscriptions(account["account_id"])
         )
 
         if is_first_login:
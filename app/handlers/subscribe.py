@@ -1,31 +1,30 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from app.services.categories import all_categories, subscriber_counts
 from app.services.user_service import (
     VERIFY_MSG,
     get_verified_account,
-    get_all_categories,
     get_account_subscriptions,
-    get_category_subscriber_counts,
     toggle_subscription,
 )
 
 
 async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show category subscription menu with toggle checkmarks."""
-    account = get_verified_account(update.effective_user.id)
+    account = await get_verified_account(update.effective_user.id)
     if not account:
         await update.message.reply_text(VERIFY_MSG)
         return
 
-    categories = get_all_categories()
+    categories = await all_categories()
     if not categories:
         await update.message.reply_text(
             "No categories available yet. Events will create categories automatically!"
         )
         return
-    subscribed_ids = _get_subscribed_ids(account["account_id"])
-    counts = get_category_subscriber_counts()
+    subscribed_ids = await _get_subscribed_ids(account["account_id"])
+    counts = await subscriber_counts()
     keyboard = _build_category_keyboard(categories, subscribed_ids, counts)
     await update.message.reply_text(
         "Tap a category to subscribe/unsubscribe:",
@@ -44,19 +43,19 @@ async def handle_subscription_toggle(update: Update, context: ContextTypes.DEFAU
 
     _, action = parts
 
-    account = get_verified_account(query.from_user.id)
+    account = await get_verified_account(query.from_user.id)
     if not account:
         await query.answer(VERIFY_MSG, show_alert=True)
         return
 
     # "start" from /start onboarding button -> show the keyboard
     if action == "start":
-        categories = get_all_categories()
+        categories = await all_categories()
         if not categories:
             await query.answer("No categories available yet.", show_alert=True)
             return
-        subscribed_ids = _get_subscribed_ids(account["account_id"])
-        counts = get_category_subscriber_counts()
+        subscribed_ids = await _get_subscribed_ids(account["account_id"])
+        counts = await subscriber_counts()
         keyboard = _build_category_keyboard(categories, subscribed_ids, counts)
         await query.message.reply_text(
             "Tap a category to subscribe/unsubscribe:",
@@ -66,7 +65,7 @@ async def handle_subscription_toggle(update: Update, context: ContextTypes.DEFAU
 
     # "done" -> confirm and close
     if action == "done":
-        subscribed_ids = _get_subscribed_ids(account["account_id"])
+        subscribed_ids = await _get_subscribed_ids(account["account_id"])
         count = len(subscribed_ids)
         await query.edit_message_text(
             f"Subscriptions saved! You're following {count} category{'s' if count != 1 else ''}."
@@ -80,21 +79,20 @@ async def handle_subscription_toggle(update: Update, context: ContextTypes.DEFAU
 
     # Otherwise it's a category_id toggle
     category_id = action
-    toggle_subscription(account["account_id"], category_id)
+    change = await toggle_subscription(account["account_id"], category_id)
 
-    # Refresh keyboard with updated counts
-    categories = get_all_categories()
-    subscribed_ids = _get_subscribed_ids(account["account_id"])
-    counts = get_category_subscriber_counts()
-    keyboard = _build_category_keyboard(categories, subscribed_ids, counts)
+    # Refresh keyboard from the toggle result and the in-memory catalogue
+    categories = await all_categories()
+    counts = await subscriber_counts()
+    keyboard = _build_category_keyboard(categories, change["subscriptions"], counts)
     try:
         await query.edit_message_reply_markup(reply_markup=keyboard)
     except Exception:
         pass
 
 
-def _get_subscribed_ids(account_id: str) -> set:
-    subs = get_account_subscriptions(account_id)
+async def _get_subscribed_ids(account_id: str) -> set:
+    subs = await get_account_subscriptions(account_id)
     return {s["fk_category_id"] for s in subs}
 
 
@@ -48,7 +48,7 @@ async def receive_email(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Send magic link — tele_id and tele_handle are embedded in Auth user metadata
     # so they're available at callback time without any separate storage
     try:
-        send_verification_email(
+        await send_verification_email(
             email,
             f"{settings.WEBHOOK_URL}/auth/callback/{urllib.parse.quote(email, safe='')}",
             tele_id=user.id,
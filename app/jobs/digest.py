@@ -1,107 +1,175 @@
+import asyncio
 import logging
 from datetime import datetime, timedelta
 
 from telegram import Bot
 
 from app.config import SGT
-from app.services.supabase_client import supabase
+from app.services.broadcast import broadcast
+from app.services.coordination import claim_run
+from app.services.scheduler import record_job_metric
+from app.services.supabase_client import (
+    get_account_subscriptions,
+    get_job_high_water_mark,
+    get_newsletter_accounts,
+    get_upcoming_events_for_categories,
+    set_job_high_water_mark,
+    set_last_newsletter_sent,
+)
 
 logger = logging.getLogger(__name__)
 
+DIGEST_EVENT_LIMIT = 10
+JOB_ID = "check_newsletter"
+# Missed slots older than this are skipped rather than replayed (matches the 23h double-send guard)
+MAX_CATCHUP = timedelta(hours=23)
+# Accounts per batch (keeps IN() lists and PostgREST row limits in check) and batches in parallel
+ACCOUNT_BATCH_SIZE = 100
+BATCH_CONCURRENCY = 4
+
 
 async def check_newsletter_due(bot: Bot):
-    """Runs every minute. Find accounts whose newsletter_time matches the current minute and send newsletter."""
+    """Runs every minute. Send the digest to accounts whose newsletter_time falls in any
+    minute slot since the last processed one, so slots skipped by a slow run or a
+    restart are caught up.
+
+    Set-based: each batch of accounts loads its subscriptions and the week's
+    categorised events in one query each, digests are assembled in memory, and
+    last_newsletter_sent is written in one bulk update per batch.
+    """
     now = datetime.now(SGT)
-    current_time = now.strftime("%H:%M") + ":00"  # Match TIME format HH:MM:SS
-
-    accounts_result = (
-        supabase.table("accounts")
-        .select("*")
-        .eq("newsletter_time", current_time)
-        .execute()
-    )
-
-    for account in accounts_result.data:
+    current_slot = now.replace(second=0, microsecond=0)
+
+    last_done = await get_job_high_water_mark(JOB_ID)
+    first_slot = current_slot
+    if last_done is not None:
+        first_slot = max(last_done.astimezone(SGT) + timedelta(minutes=1), current_slot - MAX_CATCHUP)
+    if first_slot > current_slot:
+        return  # This minute was already handled
+    if not await claim_run(JOB_ID, current_slot.isoformat()):
+        return  # Another replica is running this minute
+    record_job_metric(JOB_ID, "slots_behind", int((current_slot - first_slot).total_seconds() // 60))
+
+    accounts = []
+    for account in await _load_slot_accounts(first_slot, current_slot):
         if not account.get("tele_id"):
             continue
+        # The slot this account is due in; a late catch-up still counts as that slot's
+        # digest, so tomorrow's is neither skipped nor keyed to the wrong day
+        account["slot"] = _slot_for(account["newsletter_time"], first_slot, current_slot)
         # Check last_newsletter_sent to prevent double-sends
         last_sent = account.get("last_newsletter_sent")
         if last_sent:
             try:
                 last_dt = datetime.fromisoformat(last_sent)
-                if (now - last_dt).total_seconds() < 82800:  # 23 hours
+                if (account["slot"] - last_dt).total_seconds() < 82800:  # 23 hours
                     continue
             except (ValueError, TypeError):
                 pass
-        await _send_newsletter_to_account(bot, account, now)
+        accounts.append(account)
 
+    batches = [accounts[i:i + ACCOUNT_BATCH_SIZE] for i in range(0, len(accounts), ACCOUNT_BATCH_SIZE)]
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
 
-async def _send_newsletter_to_account(bot: Bot, account: dict, now: datetime):
-    """Compile and send newsletter for a single account."""
-    account_id = account["account_id"]
-    tele_id = account["tele_id"]
+    async def run_batch(batch: list[dict]):
+        async with slots:
+            await _send_batch(bot, batch, now)
 
-    # Get subscribed category IDs
-    subs = (
-        supabase.table("account_categories")
-        .select("fk_category_id")
-        .eq("fk_account_id", account_id)
-        .execute()
-    )
-    category_ids = [s["fk_category_id"] for s in subs.data]
-    if not category_ids:
+    results = await asyncio.gather(*(run_batch(b) for b in batches), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    for error in failures:
+        logger.error("Digest batch failed: %s", error)
+    if failures:
+        return  # Leave the high-water mark so the next run retries these slots
+
+    await set_job_high_water_mark(JOB_ID, current_slot)
+
+
+async def _load_slot_accounts(first_slot: datetime, last_slot: datetime) -> list[dict]:
+    """Accounts whose newsletter_time is a minute in [first_slot, last_slot]."""
+    start = first_slot.strftime("%H:%M") + ":00"  # Match TIME format HH:MM:SS
+    end = last_slot.strftime("%H:%M") + ":00"
+    return await get_newsletter_accounts(start, end)
+
+
+def _slot_for(newsletter_time: str, first_slot: datetime, last_slot: datetime) -> datetime:
+    """The minute in [first_slot, last_slot] whose time of day is newsletter_time (HH:MM:SS)."""
+    hour, minute = (int(part) for part in newsletter_time.split(":")[:2])
+    slot = first_slot.replace(hour=hour, minute=minute)
+    if slot < first_slot:
+        slot = last_slot.replace(hour=hour, minute=minute)  # Window wraps past midnight
+    return slot
+
+
+async def _send_batch(bot: Bot, accounts: list[dict], now: datetime):
+    subscriptions = await get_account_subscriptions([a["account_id"] for a in accounts])
+    if not subscriptions:
         return  # No subscriptions
 
-    # Get upcoming events in subscribed categories (this week)
+    events_by_category = await _load_week_events(
+        set().union(*subscriptions.values()), now
+    )
+
+    # Messages per digest day: a catch-up spanning midnight covers two days' slots
+    messages_by_day: dict[str, list[tuple[int, str]]] = {}
+    accounts_by_tele_id = {}
+    for account in accounts:
+        category_ids = subscriptions.get(account["account_id"])
+        if not category_ids:
+            continue
+        text = _build_newsletter(category_ids, events_by_category)
+        if text:
+            messages_by_day.setdefault(account["slot"].date().isoformat(), []).append((account["tele_id"], text))
+            accounts_by_tele_id[account["tele_id"]] = account
+
+    for day, messages in messages_by_day.items():
+        result = await broadcast(bot, f"digest:{day}", messages)
+
+        # Update last_newsletter_sent with the slot each digest was due in
+        account_ids_by_slot: dict[datetime, list[str]] = {}
+        for tele_id in result.sent:
+            account = accounts_by_tele_id[tele_id]
+            account_ids_by_slot.setdefault(account["slot"], []).append(account["account_id"])
+        for slot, account_ids in account_ids_by_slot.items():
+            await set_last_newsletter_sent(account_ids, slot)
+
+
+async def _load_week_events(category_ids: set, now: datetime) -> dict[str, list[dict]]:
+    """Upcoming events this week for the given categories, as {category_id: [event, ...]}.
+
+    Date, deletion and per-category limit are applied in SQL, so only rows a digest
+    could render are transferred.
+    """
     today = now.replace(hour=0, minute=0, second=0, microsecond=0)
     week_later = today + timedelta(days=7)
 
-    events_result = (
-        supabase.table("event_categories")
-        .select("fk_event_id, events(event_id, text, date)")
-        .in_("fk_category_id", category_ids)
-        .execute()
+    rows = await get_upcoming_events_for_categories(
+        list(category_ids), now, week_later, limit=DIGEST_EVENT_LIMIT
     )
+    events_by_category: dict[str, list[dict]] = {}
+    for row in rows:
+        events_by_category.setdefault(row["category_id"], []).append(row["event"])
+    return events_by_category
 
-    # Filter to upcoming events within the week, deduplicate
-    events = []
-    seen_ids = set()
-    for row in events_result.data:
-        event = row.get("events")
-        if not event or event["event_id"] in seen_ids:
-            continue
-        seen_ids.add(event["event_id"])
-        if event.get("date"):
-            try:
-                event_dt = datetime.fromisoformat(event["date"])
-                if today <= event_dt <= week_later:
-                    events.append(event)
-            except (ValueError, TypeError):
-                continue
 
-    if not events:
-        return
+def _build_newsletter(category_ids: set, events_by_category: dict[str, list[dict]]) -> str | None:
+    """Compile the newsletter text for one account, or None if there's nothing to send."""
+    # Deduplicate events that sit in several subscribed categories
+    events = {}
+    for category_id in category_ids:
+        for event in events_by_category.get(category_id, []):
+            events[event["event_id"]] = event
 
-    events.sort(key=lambda e: e.get("date", ""))
+    if not events:
+        return None
 
     # Format newsletter
     lines = ["Your Daily Pulse — Upcoming Events This Week\n"]
-    for event in events[:10]:
+    for event in sorted(events.values(), key=lambda e: e.get("date", ""))[:DIGEST_EVENT_LIMIT]:
         date_str = event.get("date", "TBD")
         text_preview = event.get("text", "")
         if len(text_preview) > 80:
             text_preview = text_preview[:80] + "..."
         lines.append(f"{date_str}\n{text_preview}\n")
 
-    try:
-        await bot.send_message(chat_id=tele_id, text="\n".join(lines))
-        # Update last_newsletter_sent
-        (
-            supabase.table("accounts")
-            .update({"last_newsletter_sent": now.isoformat()})
-            .eq("account_id", account_id)
-            .execute()
-        )
-        logger.info("Sent newsletter to tele_id %s", tele_id)
-    except Exception as e:
-        logger.error("Failed to send newsletter to %s: %s", tele_id, e)
+    return "\n".join(lines)
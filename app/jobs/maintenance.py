@@ -0,0 +1,46 @@
+import logging
+from datetime import datetime, timedelta
+
+from app.config import SGT, settings
+from app.services.coordination import claim_run
+from app.services.supabase_client import (
+    prune_deliveries,
+    prune_extraction_cache,
+    prune_find_sessions,
+    prune_job_runs,
+)
+
+logger = logging.getLogger(__name__)
+
+# Broadcast delivery rows only matter while a run might still be resumed
+DELIVERY_RETENTION = timedelta(days=14)
+# Run claims only need to outlive the longest interval between two claims of the same key
+JOB_RUN_RETENTION = timedelta(days=14)
+# "Next page" buttons older than this report the search as expired
+FIND_SESSION_RETENTION = timedelta(days=1)
+
+
+async def prune_caches():
+    """Runs daily. Drop persisted cache rows that are past their TTL."""
+    if not await claim_run("prune_caches", datetime.now(SGT).date().isoformat()):
+        return
+    try:
+        await prune_extraction_cache(timedelta(hours=settings.EXTRACTION_CACHE_TTL_HOURS))
+        logger.info("Pruned expired extraction cache rows")
+    except Exception as e:
+        logger.error("Failed to prune extraction cache: %s", e)
+    try:
+        await prune_deliveries(DELIVERY_RETENTION)
+        logger.info("Pruned old broadcast delivery rows")
+    except Exception as e:
+        logger.error("Failed to prune broadcast deliveries: %s", e)
+    try:
+        await prune_job_runs(JOB_RUN_RETENTION)
+        logger.info("Pruned old job run claims")
+    except Exception as e:
+        logger.error("Failed to prune job run claims: %s", e)
+    try:
+        await prune_find_sessions(FIND_SESSION_RETENTION)
+        logger.info("Pruned old /find sessions")
+    except Exception as e:
+        logger.error("Failed to prune /find sessions: %s", e)
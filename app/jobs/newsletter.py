@@ -1,33 +1,45 @@
 import logging
+from datetime import datetime, timedelta
 
 from telegram import Bot
 
-from app.services.supabase_client import supabase
+from app.config import SGT
+from app.services.broadcast import broadcast
+from app.services.coordination import claim_run, finish_run, stale_runs
+from app.services.supabase_client import get_subscriber_tele_ids, get_top_events_between
 
 logger = logging.getLogger(__name__)
 
+JOB_ID = "weekly_newsletter"
+# A claimed roundup not finished within this long is assumed interrupted and resumed
+RUN_TIMEOUT = timedelta(hours=1)
+# Interrupted roundups older than this are abandoned rather than sent late
+MAX_RESUME_AGE = timedelta(hours=6)
+
 
 async def send_weekly_newsletter(bot: Bot):
     """Compile top events of the week and send to accounts with at least one subscription."""
-    # Get top events by RSVP count
-    result = supabase.table("rsvps").select("fk_event_id, events(event_id, title, text, date)").execute()
-
-    event_counts = {}
-    event_data = {}
-    for row in result.data:
-        eid = row["fk_event_id"]
-        event = row.get("events")
-        if not event:
-            continue
-        event_counts[eid] = event_counts.get(eid, 0) + 1
-        if eid not in event_data:
-            event_data[eid] = event
-
-    sorted_events = sorted(event_counts, key=event_counts.get, reverse=True)[:10]
-    top_events = [event_data[eid] for eid in sorted_events if eid in event_data]
+    await _send_roundup(bot, datetime.now(SGT).date().isoformat())
+
+
+async def resume_weekly_newsletter(bot: Bot):
+    """Runs periodically. Finish roundups whose replica died mid-send; the broadcast
+    key is the same, so accounts already reached are skipped."""
+    for run_key in await stale_runs(JOB_ID, RUN_TIMEOUT, MAX_RESUME_AGE):
+        logger.info("Resuming interrupted weekly newsletter %s", run_key)
+        await _send_roundup(bot, run_key)
+
+
+async def _send_roundup(bot: Bot, run_key: str):
+    if not await claim_run(JOB_ID, run_key, stale_after=RUN_TIMEOUT):
+        return
+    # Top upcoming events for the coming week by RSVP count
+    now = datetime.now(SGT)
+    top_events = await get_top_events_between(now, now + timedelta(days=7), limit=10)
 
     if not top_events:
         logger.info("No events for weekly newsletter")
+        await finish_run(JOB_ID, run_key)
         return
 
     # Format newsletter
@@ -35,40 +47,24 @@ async def send_weekly_newsletter(bot: Bot):
     for i, event in enumerate(top_events, 1):
         title = event.get("title") or event.get("text", "")[:60]
         date = event.get("date", "TBD")
-        count = event_counts.get(event["event_id"], 0)
+        count = event["rsvp_count"]
         lines.append(f"{i}. {title}\n   {date} | {count} RSVPs\n")
 
     newsletter_text = "\n".join(lines)
 
-    # Get accounts that have at least one category subscription
-    subs = (
-        supabase.table("account_categories")
-        .select("fk_account_id")
-        .execute()
-    )
-    subscribed_account_ids = list({s["fk_account_id"] for s in subs.data})
+    # Accounts that have at least one category subscription
+    tele_ids = await get_subscriber_tele_ids()
 
-    if not subscribed_account_ids:
+    if not tele_ids:
         logger.info("No subscribed accounts for weekly newsletter")
+        await finish_run(JOB_ID, run_key)
         return
 
-    # Get tele_ids for those accounts
-    accounts = (
-        supabase.table("accounts")
-        .select("tele_id")
-        .in_("account_id", subscribed_account_ids)
-        .execute()
+    result = await broadcast(
+        bot,
+        f"weekly:{run_key}",
+        [(tele_id, newsletter_text) for tele_id in tele_ids],
     )
-
-    sent_count = 0
-    for account in accounts.data:
-        tele_id = account.get("tele_id")
-        if not tele_id:
-            continue
-        try:
-            await bot.send_message(chat_id=tele_id, text=newsletter_text)
-            sent_count += 1
-        except Exception as e:
-            logger.error("Failed to send weekly newsletter to %s: %s", tele_id, e)
-
-    logger.info("Weekly newsletter sent to %d accounts", sent_count)
+    # Only now is the run done; until then the resume job can pick it up
+    await finish_run(JOB_ID, run_key)
+    logger.info("Weekly newsletter sent to %d accounts", len(result.sent))
@@ -1,54 +1,107 @@
+import asyncio
 import logging
-from datetime import datetime, timezone
+from collections import defaultdict
+from datetime import timedelta
 
 from telegram import Bot
 
-from app.services.supabase_client import supabase
+from app.services.broadcast import broadcast
+from app.services.coordination import INSTANCE_ID
+from app.services.supabase_client import (
+    claim_due_reminders,
+    claim_reminders_by_id,
+    mark_reminders_sent,
+    release_reminder_claims,
+)
 
 logger = logging.getLogger(__name__)
 
+# Reminders claimed per RPC call, and claimed batches sent side by side
+CLAIM_BATCH_SIZE = 100
+BATCH_CONCURRENCY = 3
+# A claim older than this is assumed to belong to a crashed runner and is taken over
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
 
 async def check_due_reminders(bot: Bot):
-    """Runs every minute. Finds and sends reminders where remind_at <= now and is_sent = false."""
-    now = datetime.now(timezone.utc).isoformat()
-    result = (
-        supabase.table("reminders")
-        .select("*, accounts(tele_id), events(text, date)")
-        .eq("is_sent", False)
-        .lte("remind_at", now)
-        .limit(100)
-        .execute()
-    )
-
-    for reminder in result.data:
-        account = reminder.get("accounts")
-        event = reminder.get("events")
-        if not account or not event:
-            continue
+    """Reconciliation sweep (every 15 minutes). Drains every due, unsent reminder,
+    catching anything the in-process timer missed (created on another replica,
+    beyond the loaded window, or left behind by a crash).
+
+    Batches are claimed atomically in the DB (FOR UPDATE SKIP LOCKED), so
+    overlapping runners never send the same reminder. Each batch goes out through
+    the broadcast engine, and each chat's reminders are marked sent as soon as its
+    message is delivered; reminders that hit transient send errors are released
+    for the next run.
+    """
+    total = 0
+    while True:
+        claimed = await asyncio.gather(*(
+            claim_due_reminders(CLAIM_BATCH_SIZE, INSTANCE_ID, CLAIM_TIMEOUT)
+            for _ in range(BATCH_CONCURRENCY)
+        ))
+        batches = [batch for batch in claimed if batch]
+        if not batches:
+            break
+        results = await asyncio.gather(*(_send_batch(bot, batch) for batch in batches), return_exceptions=True)
+        for error in (r for r in results if isinstance(r, Exception)):
+            # Claims left behind expire after CLAIM_TIMEOUT and are picked up again
+            logger.error("Reminder batch failed: %s", error)
+        total += sum(len(batch) for batch in batches)
+        if any(len(batch) < CLAIM_BATCH_SIZE for batch in claimed):
+            break  # The due set is drained
+        if not all(r is True for r in results):
+            break  # Released reminders wait for the next run rather than being retried in a tight loop
+    if total:
+        logger.info("Processed %d due reminders", total)
+
+
+async def send_reminders(bot: Bot, reminder_ids: list[str]):
+    """Claim and send specific reminders; called by the reminder timer when they fall due."""
+    for i in range(0, len(reminder_ids), CLAIM_BATCH_SIZE):
+        batch = await claim_reminders_by_id(reminder_ids[i:i + CLAIM_BATCH_SIZE], INSTANCE_ID, CLAIM_TIMEOUT)
+        if batch:
+            await _send_batch(bot, batch)
+
 
-        tele_id = account.get("tele_id")
-        if not tele_id:
+async def _send_batch(bot: Bot, reminders: list[dict]) -> bool:
+    """Send one claimed batch. Returns False if any reminders were released for retry."""
+    by_chat: dict[int, list[dict]] = defaultdict(list)
+    done = []
+    for reminder in reminders:
+        if not reminder.get("tele_id") or not reminder.get("event"):
+            done.append(reminder["reminder_id"])  # Nobody or nothing to remind about
             continue
+        by_chat[reminder["tele_id"]].append(reminder)
+
+    marked: set[int] = set()
+
+    async def on_delivery(tele_id: int, status: str):
+        # Sent, or permanently undeliverable (bot blocked, chat gone): either way done.
+        # Marked as each chat goes out, so a crash mid-batch re-sends nothing already delivered.
+        if status != "retry":
+            await mark_reminders_sent([r["reminder_id"] for r in by_chat[tele_id]])
+            marked.add(tele_id)
+
+    try:
+        # One message per chat, even when several of a user's reminders fall due together
+        messages = [(tele_id, _reminder_text([r["event"] for r in rs])) for tele_id, rs in by_chat.items()]
+        await broadcast(bot, "reminders", messages, on_delivery)
+    except Exception as e:
+        logger.error("Reminder broadcast failed: %s", e)
+
+    retry_ids = [r["reminder_id"] for tele_id, rs in by_chat.items() if tele_id not in marked for r in rs]
+    await mark_reminders_sent(done)
+    await release_reminder_claims(retry_ids)
+    if retry_ids:
+        logger.warning("Released %d reminders for retry", len(retry_ids))
+    return not retry_ids
+
 
-        event_text = event.get("text", "an event")
-        event_date = event.get("date", "")
-
-        try:
-            await bot.send_message(
-                chat_id=tele_id,
-                text=(
-                    f"⏰ Reminder: {event_text}\n\n"
-                    f"📅 {event_date}\n\n"
-                    "This event is coming up soon!"
-                ),
-            )
-            # Mark as is_sent
-            (
-                supabase.table("reminders")
-                .update({"is_sent": True})
-                .eq("reminder_id", reminder["reminder_id"])
-                .execute()
-            )
-            logger.info("Sent reminder %s to tele_id %s", reminder["reminder_id"], tele_id)
-        except Exception as e:
-            logger.error("Failed to send reminder %s: %s", reminder["reminder_id"], e)
+def _reminder_text(events: list[dict]) -> str:
+    sections = [
+        f"⏰ Reminder: {event.get('text') or 'an event'}\n\n📅 {event.get('date') or ''}"
+        for event in events
+    ]
+    footer = "This event is coming up soon!" if len(events) == 1 else "These events are coming up soon!"
+    return "\n\n".join(sections) + "\n\n" + footer
@@ -1,3 +1,5 @@
+import asyncio
+import functools
 import logging
 import urllib.parse
 from contextlib import asynccontextmanager
@@ -8,17 +10,46 @@ from telegram import Update
 
 from app.bot import create_application
 from app.config import settings
-from app.services.supabase_client import supabase, verify_access_token
+from app.services.categories import load_categories
+from app.services.coordination import INSTANCE_ID, is_leader, release_leadership
+from app.services.dedup import warm_duplicate_index
+from app.services.gemini import extraction_stats
+from app.jobs.reminders import send_reminders
+from app.middleware.rate_limit import rate_limit_stats
+from app.services.media import media_stats, start_media_workers, stop_media_workers
+from app.services.reminder_timer import start_reminder_timer, stop_reminder_timer, timer_stats
+from app.services.scheduler import init_scheduler, job_stats, shutdown_scheduler
+from app.services.search_index import load_search_index
+from app.services.supabase_client import (
+    init_supabase,
+    upsert_account,
+    verify_access_token,
+    verify_email_otp,
+)
+from app.services.trending import refresh_trending
+from app.services.user_service import account_cache_stats, invalidate_account
 
 logger = logging.getLogger(__name__)
 
 ptb_app = None
+_warm_up_task = None
+
+
+async def _warm_up():
+    """Fill the in-process indexes and caches. Best-effort: each one also loads lazily,
+    falls back to SQL or is refreshed on a schedule, so a failure here only costs latency."""
+    for warm in (warm_duplicate_index, load_categories, load_search_index, refresh_trending):
+        try:
+            await warm()
+        except Exception:
+            logger.exception("Warm-up step %s failed", warm.__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global ptb_app
+    global ptb_app, _warm_up_task
     try:
+        await init_supabase()
         ptb_app = create_application()
         await ptb_app.initialize()
         await ptb_app.start()
@@ -26,16 +57,23 @@ async def lifespan(app: FastAPI):
             url=f"{settings.WEBHOOK_URL}/webhook",
             secret_token=settings.WEBHOOK_SECRET,
         )
+        start_media_workers(ptb_app.bot)
+        start_reminder_timer(functools.partial(send_reminders, ptb_app.bot))
         # Start background scheduler for reminders and newsletters
-        from app.services.scheduler import init_scheduler, shutdown_scheduler
         init_scheduler(ptb_app.bot)
         logger.info("Startup complete")
     except Exception:
         logger.exception("Startup failed")
+    # Warm up while webhooks are already being served
+    _warm_up_task = asyncio.create_task(_warm_up())
     yield
+    _warm_up_task.cancel()
     if ptb_app:
-        from app.services.scheduler import shutdown_scheduler
         shutdown_scheduler()
+        # Hand the lease over now rather than making other replicas wait for it to expire
+        await release_leadership()
+        await stop_reminder_timer()
+        await stop_media_workers()
         await ptb_app.stop()
         await ptb_app.shutdown()
 
@@ -74,12 +112,11 @@ async def auth_confirm(request: Request, encoded_email: str):
         return html_result("Error", "No token found. Please try /verify again.")
 
     try:
-        result = supabase.auth.verify_otp({"email": email, "token_hash": token_hash, "type": token_type})
+        auth_user = await verify_email_otp(email, token_hash, token_type)
     except Exception as e:
         logger.exception("verify_otp failed: %s", e)
         return html_result("Verification failed", "Invalid or expired link. Please try /verify again.")
 
-    auth_user = result.user if result else None
     if not auth_user or not auth_user.email:
         return html_result("Verification failed", "Could not verify email. Please try /verify again.")
 
@@ -91,11 +128,8 @@ async def auth_confirm(request: Request, encoded_email: str):
 
     account_id = str(auth_user.id)
     try:
-        supabase.table("accounts").upsert({
-            "account_id": account_id,
-            "tele_id": tele_id,
-            "tele_handle": tele_handle,
-        }, on_conflict="account_id").execute()
+        await upsert_account(account_id, tele_id, tele_handle)
+        invalidate_account(tele_id, account_id)
         logger.info("User verified: @%s (%s)", tele_handle, auth_user.email)
     except Exception as e:
         logger.error("Failed to save account: %s", e)
@@ -121,7 +155,7 @@ async def auth_complete(request: Request):
 
     # Verify token with Supabase Auth
     try:
-        auth_user = verify_access_token(access_token)
+        auth_user = await verify_access_token(access_token)
     except Exception:
         return JSONResponse({"ok": False, "message": "Invalid or expired token. Please try /verify again."})
 
@@ -139,11 +173,8 @@ async def auth_complete(request: Request):
     account_id = str(auth_user.id)
     email = auth_user.email.lower()
     try:
-        supabase.table("accounts").upsert({
-            "account_id": account_id,
-            "tele_id": tele_id,
-            "tele_handle": tele_handle,
-        }, on_conflict="account_id").execute()
+        await upsert_account(account_id, tele_id, tele_handle)
+        invalidate_account(tele_id, account_id)
         logger.info("User verified: @%s (%s)", tele_handle, email)
     except Exception as e:
         logger.error("Failed to save account: %s", e)
@@ -163,3 +194,16 @@ async def auth_complete(request: Request):
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "gemini": extraction_stats(),
+        "media": media_stats(),
+        "accounts": account_cache_stats(),
+        "rate_limits": rate_limit_stats(),
+        "reminder_timer": timer_stats(),
+        "jobs": job_stats(),
+        "scheduler": {"instance": INSTANCE_ID, "leader": is_leader()},
+    }
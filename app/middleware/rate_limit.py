@@ -1,22 +1,139 @@
-from datetime import datetime, timedelta, timezone
+"""Per-user rate limiting for incoming updates.
 
-from app.services.supabase_client import supabase
+Runs as a TypeHandler in group -1, ahead of every other handler, so a flood is
+dropped before it costs a DB query or an LLM call. Each (tele_id, rule) pair is a
+GCRA bucket, which needs a single timestamp of state; buckets are merged into
+Postgres periodically so limits survive restarts and are shared across replicas.
+The DB-side posting limit in ingest_event stays authoritative for posts.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from app.services.supabase_client import sync_rate_limits
+
+logger = logging.getLogger(__name__)
 
 MAX_POSTS_PER_HOUR = 5
 
 
-def check_rate_limit(account_id: str) -> bool:
-    """Returns True if within rate limit, False if exceeded.
-
-    DB-backed: counts events posted by this account in the last hour,
-    so the limit persists across server restarts.
-    """
-    cutoff = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
-    result = (
-        supabase.table("events")
-        .select("event_id", count="exact")
-        .eq("fk_account_id", account_id)
-        .gte("created_at", cutoff)
-        .execute()
-    )
-    return (result.count or 0) < MAX_POSTS_PER_HOUR
+@dataclass(frozen=True)
+class Rule:
+    limit: int  # requests allowed per period, all of which may arrive as one burst
+    period: float  # seconds
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+
+RULES = {
+    # Counts attempts (including duplicates and parse failures), so it is looser than
+    # the per-account limit ingest_event enforces on successful posts
+    "post": Rule(MAX_POSTS_PER_HOUR * 2, 3600),
+    "find": Rule(10, 60),
+    "events": Rule(10, 60),
+    "trending": Rule(10, 60),
+    "callback": Rule(30, 60),
+}
+
+_POST_RE = re.compile(r"(?i)#unipulse")
+
+# key -> theoretical arrival time (epoch seconds); a request is allowed while
+# now >= tat - (period - interval), and each allowed request pushes tat by interval
+_tat: dict[str, float] = {}
+_dirty: set[str] = set()
+# Keys already told to slow down; cleared once they are allowed again
+_warned: set[str] = set()
+_stats: dict[str, int] = {}
+
+
+def rate_limit_stats() -> dict:
+    return {"tracked_keys": len(_tat), "rejected": dict(_stats)}
+
+
+def allow(tele_id: int, rule_name: str) -> bool:
+    """Count one request against the user's bucket for rule_name. False if over the limit."""
+    rule = RULES[rule_name]
+    key = f"{tele_id}:{rule_name}"
+    now = time.time()
+    tat = max(_tat.get(key, now), now)
+    if tat - now > rule.period - rule.interval:
+        return False
+    _tat[key] = tat + rule.interval
+    _dirty.add(key)
+    return True
+
+
+def _rule_for(update: Update) -> Optional[str]:
+    if update.callback_query:
+        return "callback"
+    message = update.message
+    if not message or not message.text:
+        return None
+    if message.text.startswith("/"):
+        command = message.text.split()[0][1:].split("@")[0].lower()
+        return command if command in RULES else None
+    if message.chat.type != "private" and _POST_RE.search(message.text):
+        return "post"
+    return None
+
+
+async def enforce_rate_limit(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Group -1 handler: stop the update here if the user is over the limit for its rule."""
+    rule_name = _rule_for(update)
+    if not rule_name or not update.effective_user:
+        return
+    key = f"{update.effective_user.id}:{rule_name}"
+    if allow(update.effective_user.id, rule_name):
+        _warned.discard(key)
+        return
+
+    _stats[rule_name] = _stats.get(rule_name, 0) + 1
+    if key not in _warned:
+        # Tell the user once per throttled stretch; further rejections are silent
+        _warned.add(key)
+        try:
+            if update.callback_query:
+                await update.callback_query.answer("Too many taps, slow down a little.")
+            elif rule_name == "post":
+                await update.message.reply_text("⚠️ You're posting too quickly. Please wait before posting more events.")
+            else:
+                await update.message.reply_text("You're sending commands too quickly. Try again in a minute.")
+        except Exception as e:
+            logger.debug("Could not send rate-limit notice: %s", e)
+    raise ApplicationHandlerStop
+
+
+async def sync_rate_limit_state():
+    """Merge local buckets with the DB and adopt stricter remote state. Runs on a schedule."""
+    global _dirty
+    keys, _dirty = _dirty, set()
+    states = [
+        {"key": key, "tat": datetime.fromtimestamp(_tat[key], timezone.utc).isoformat()}
+        for key in keys
+        if key in _tat
+    ]
+    try:
+        remote = await sync_rate_limits(states)
+    except Exception as e:
+        _dirty |= keys  # Retry on the next sync
+        logger.error("Rate limit sync failed: %s", e)
+        return
+
+    for row in remote:
+        tat = datetime.fromisoformat(row["tat"]).timestamp()
+        if tat > _tat.get(row["key"], 0):
+            _tat[row["key"]] = tat
+
+    # Buckets that have fully drained carry no state worth keeping
+    now = time.time()
+    for key in [k for k, tat in _tat.items() if tat <= now]:
+        del _tat[key]
+        _warned.discard(key)
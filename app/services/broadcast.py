@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from app.config import settings
+from app.services.supabase_client import get_finished_deliveries, record_deliveries
+from app.services.throttle import acquire_send
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1.0  # seconds; doubles on each network retry
+
+
+@dataclass
+class BroadcastResult:
+    sent: list[int] = field(default_factory=list)
+    failed: list[int] = field(default_factory=list)
+    # Subset of failed that gave up on transient errors and is worth retrying later
+    retryable: list[int] = field(default_factory=list)
+    skipped: int = 0
+
+
+class _Run:
+    """State shared by the workers of one broadcast."""
+
+    def __init__(self, key: str, on_delivery: Optional[Callable[[int, str], Awaitable]] = None):
+        self.key = key
+        self.result = BroadcastResult()
+        self.paused_until = 0.0
+        self.on_delivery = on_delivery
+
+    async def record(self, chat_id: int, status: str, attempts: int, error: str | None = None):
+        """Persist one delivery straight away, so a crash re-sends at most the
+        messages in flight (one per worker) when the run is resumed."""
+        (self.result.sent if status == "sent" else self.result.failed).append(chat_id)
+        if status == "retry":
+            self.result.retryable.append(chat_id)
+        try:
+            if self.on_delivery:
+                await self.on_delivery(chat_id, status)
+                return
+            await record_deliveries([{
+                "broadcast_key": self.key,
+                "chat_id": chat_id,
+                "status": status,
+                "attempts": attempts,
+                "last_error": error,
+            }])
+        except Exception as e:
+            logger.error("Failed to persist delivery to %s for %s: %s", chat_id, self.key, e)
+
+
+async def broadcast(
+    bot: Bot,
+    key: str,
+    messages: list[tuple[int, str]],
+    on_delivery: Optional[Callable[[int, str], Awaitable]] = None,
+) -> BroadcastResult:
+    """Send one text per chat, resumably.
+
+    key identifies the run (e.g. "weekly:2026-03-01"). Recipients already recorded
+    as sent or permanently failed under the same key are skipped, so re-running an
+    interrupted broadcast only reaches the remainder; only this call's chat ids are
+    looked up, so many batches can share one key. Sends are paced by the bot-wide
+    and per-chat token buckets across BROADCAST_WORKERS workers; flood control
+    (RetryAfter) pauses every worker, and timeouts and network errors are retried
+    with backoff.
+
+    Callers that keep their own delivery state pass on_delivery(chat_id, status)
+    instead; it is awaited as each chat finishes ("sent", "failed" or "retry") and
+    broadcast_deliveries is neither read nor written.
+    """
+    run = _Run(key, on_delivery)
+    finished = set()
+    if on_delivery is None:
+        try:
+            finished = set(await get_finished_deliveries(key, [chat_id for chat_id, _ in messages]))
+        except Exception as e:
+            logger.error("Could not load delivery state for %s, sending to all: %s", key, e)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for chat_id, text in messages:
+        if chat_id in finished:
+            run.result.skipped += 1
+        else:
+            queue.put_nowait((chat_id, text))
+
+    workers = [
+        asyncio.create_task(_worker(bot, run, queue))
+        for _ in range(min(settings.BROADCAST_WORKERS, queue.qsize()))
+    ]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    logger.info(
+        "Broadcast %s: %d sent, %d failed, %d already done",
+        key, len(run.result.sent), len(run.result.failed), run.result.skipped,
+    )
+    return run.result
+
+
+async def _worker(bot: Bot, run: _Run, queue: asyncio.Queue):
+    while True:
+        chat_id, text = await queue.get()
+        try:
+            await _deliver(bot, run, chat_id, text)
+        except Exception as e:
+            logger.exception("Unexpected error delivering %s to %s: %s", run.key, chat_id, e)
+        finally:
+            queue.task_done()
+
+
+async def _deliver(bot: Bot, run: _Run, chat_id: int, text: str):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        pause = run.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        await acquire_send(chat_id)
+        try:
+            await bot.send_message(chat_id=chat_id, text=text)
+            await run.record(chat_id, "sent", attempt)
+            return
+        except RetryAfter as e:
+            delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+            run.paused_until = max(run.paused_until, time.monotonic() + delay)
+            logger.warning("Flood control during %s, pausing %ss", run.key, delay)
+            error = str(e)
+        except (Forbidden, BadRequest) as e:
+            # Blocked the bot, deleted account, bad chat id: retrying won't help
+            await run.record(chat_id, "failed", attempt, str(e))
+            return
+        except NetworkError as e:  # includes TimedOut
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            error = str(e)
+    logger.error("Giving up on %s for %s after %d attempts: %s", run.key, chat_id, MAX_ATTEMPTS, error)
+    await run.record(chat_id, "retry", MAX_ATTEMPTS, error)
@@ -0,0 +1,52 @@
+"""In-process category catalogue with subscriber counts.
+
+Loaded from the category_subscriber_counts view at startup and reconciled on a
+schedule (which also picks up changes made on other replicas). Between loads it is
+kept current by the counts subscription toggles return and by categories created during ingest, so
+the /subscribe keyboard never reads the tables.
+"""
+import logging
+
+from app.services.supabase_client import get_category_catalogue
+
+logger = logging.getLogger(__name__)
+
+_categories: dict[str, dict] = {}
+_counts: dict[str, int] = {}
+_loaded = False
+
+
+async def load_categories():
+    """Reload categories and subscriber counts from the DB. Runs at startup and on a schedule."""
+    global _categories, _counts, _loaded
+    rows = await get_category_catalogue()
+    _categories = {r["category_id"]: {"category_id": r["category_id"], "name": r["name"]} for r in rows}
+    _counts = {r["category_id"]: r["subscribers"] for r in rows}
+    _loaded = True
+    logger.info("Category catalogue loaded with %d categories", len(_categories))
+
+
+async def all_categories() -> list[dict]:
+    """All categories, sorted by name."""
+    if not _loaded:
+        await load_categories()
+    return sorted(_categories.values(), key=lambda c: c["name"])
+
+
+async def subscriber_counts() -> dict[str, int]:
+    """{category_id: subscriber_count} for all categories."""
+    if not _loaded:
+        await load_categories()
+    return dict(_counts)
+
+
+def add_category(category: dict):
+    """Record a category (e.g. one just created by ingest_event)."""
+    if category["category_id"] not in _categories:
+        _categories[category["category_id"]] = {"category_id": category["category_id"], "name": category["name"]}
+        _counts.setdefault(category["category_id"], 0)
+
+
+def set_subscribers(category_id: str, count: int):
+    """Record a category's current subscriber count (e.g. as returned by a toggle)."""
+    _counts[category_id] = count
@@ -0,0 +1,86 @@
+"""Leader election and run claims, so scheduled jobs run once across web replicas.
+
+Every replica runs the scheduler. A heartbeat keeps a lease row in Postgres; only the
+replica holding it runs leader-only jobs. Jobs that must never repeat (a weekly
+roundup, a digest slot) additionally claim their run key, which covers the window
+where a lease changes hands mid-run. Runs that must complete mark themselves finished;
+one left unfinished by a crash can be claimed again once its claim goes stale.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from app.services.supabase_client import (
+    acquire_lease,
+    claim_job_run,
+    finish_job_run,
+    get_stale_job_runs,
+    release_lease,
+)
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+LEASE_TTL_SECONDS = 45
+HEARTBEAT_SECONDS = 15
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Local deadline (monotonic) until which we may act as leader. Kept a few seconds
+# short of the DB expiry so we stop before another replica can take over.
+_leader_until = 0.0
+
+
+def is_leader() -> bool:
+    return time.monotonic() < _leader_until
+
+
+async def renew_leadership():
+    """Heartbeat: take or renew the scheduler lease. Runs on every replica."""
+    global _leader_until
+    was_leader = is_leader()
+    started = time.monotonic()
+    try:
+        held = await acquire_lease(LEASE_NAME, INSTANCE_ID, LEASE_TTL_SECONDS)
+    except Exception as e:
+        # Keep whatever time is left on the lease; it lapses on its own if the DB stays unreachable
+        logger.error("Leader lease renewal failed: %s", e)
+        return
+    _leader_until = started + LEASE_TTL_SECONDS - HEARTBEAT_SECONDS if held else 0.0
+    if held != was_leader:
+        logger.info("Scheduler leadership %s (%s)", "acquired" if held else "lost", INSTANCE_ID)
+
+
+async def release_leadership():
+    global _leader_until
+    if not is_leader():
+        return
+    _leader_until = 0.0
+    try:
+        await release_lease(LEASE_NAME, INSTANCE_ID)
+    except Exception as e:
+        logger.error("Failed to release leader lease: %s", e)
+
+
+async def claim_run(job_id: str, run_key: str, stale_after: Optional[timedelta] = None) -> bool:
+    """True if this replica is the one to execute job_id for run_key.
+
+    With stale_after, an unfinished run claimed longer ago than that is taken over.
+    """
+    claimed = await claim_job_run(job_id, run_key, INSTANCE_ID, stale_after)
+    if not claimed:
+        logger.info("Run %s/%s already claimed by another replica", job_id, run_key)
+    return claimed
+
+
+async def finish_run(job_id: str, run_key: str):
+    await finish_job_run(job_id, run_key)
+
+
+async def stale_runs(job_id: str, stale_after: timedelta, max_age: timedelta) -> list[str]:
+    """Run keys claimed more than stale_after ago (but within max_age) and never finished."""
+    return await get_stale_job_runs(job_id, stale_after, max_age)
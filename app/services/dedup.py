@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.config import settings
+from app.services.supabase_client import get_recent_events_for_dedup
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+# Posts this close in SimHash space (differing bits) are treated as the same announcement,
+# provided their dates and numbers also match. Tuned on the pairs in tests/test_dedup.py:
+# small edits (a reworded phrase, an added emoji) land at 0-14 bits, unrelated posts at 23+.
+# Recurring posts that differ only in the date land anywhere in 2-14, which is why the
+# date/number tokens must match exactly rather than relying on distance alone.
+NEAR_DUPLICATE_DISTANCE = 16
+# Very short posts don't have enough shingles for a stable SimHash; exact match only
+_MIN_TOKENS_FOR_NEAR_MATCH = 8
+
+_TOKEN_PATTERN = re.compile(r"[#\w]+")
+_DIGIT_PATTERN = re.compile(r"\d")
+# Month and weekday names and abbreviations, mapped to one spelling each
+_DATE_WORDS = {
+    alias: names.split()[0][:3]
+    for names in (
+        "january jan", "february feb", "march mar", "april apr", "may", "june jun",
+        "july jul", "august aug", "september sep sept", "october oct", "november nov",
+        "december dec", "monday mon", "tuesday tue tues", "wednesday wed",
+        "thursday thu thur thurs", "friday fri", "saturday sat", "sunday sun",
+    )
+    for alias in names.split()
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def _date_key(tokens: list[str]) -> frozenset[str]:
+    """Numbers, month and weekday names: the part of a post that changes between recurrences."""
+    return frozenset(
+        t if _DIGIT_PATTERN.search(t) else _DATE_WORDS[t]
+        for t in tokens
+        if _DIGIT_PATTERN.search(t) or t in _DATE_WORDS
+    )
+
+
+def text_fingerprint(text: str) -> str:
+    """Hash of the normalised text (case, punctuation and spacing ignored)."""
+    normalised = " ".join(_tokens(text))
+    return hashlib.sha256(normalised.encode()).hexdigest()[:32]
+
+
+def simhash(tokens: list[str]) -> int:
+    """64-bit SimHash over word 2-shingles."""
+    shingles = [" ".join(tokens[i:i + 2]) for i in range(len(tokens) - 1)] or tokens
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+class DuplicateIndex:
+    """In-memory index of recent event texts for exact and near-duplicate lookups.
+
+    Near-duplicate candidates are bucketed by date key, so a lookup only measures
+    SimHash distance against posts that mention the same dates and numbers.
+    """
+
+    def __init__(self):
+        self._by_fingerprint: dict[str, str] = {}
+        self._entries: dict[str, tuple[str, Optional[int], frozenset[str], datetime]] = {}
+        self._by_date_key: dict[frozenset[str], set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._entries
+
+    def add(self, event_id: str, text: str, created_at: Optional[datetime] = None):
+        self.remove(event_id)
+        tokens = _tokens(text)
+        fingerprint = text_fingerprint(text)
+        sig = simhash(tokens) if len(tokens) >= _MIN_TOKENS_FOR_NEAR_MATCH else None
+        date_key = _date_key(tokens)
+        self._entries[event_id] = (fingerprint, sig, date_key, created_at or datetime.now(timezone.utc))
+        self._by_fingerprint[fingerprint] = event_id
+        if sig is not None:
+            self._by_date_key.setdefault(date_key, set()).add(event_id)
+
+    def remove(self, event_id: str):
+        entry = self._entries.pop(event_id, None)
+        if not entry:
+            return
+        fingerprint, sig, date_key, _ = entry
+        if self._by_fingerprint.get(fingerprint) == event_id:
+            del self._by_fingerprint[fingerprint]
+        if sig is not None:
+            bucket = self._by_date_key.get(date_key)
+            if bucket:
+                bucket.discard(event_id)
+                if not bucket:
+                    del self._by_date_key[date_key]
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the event_id of an indexed duplicate or near-duplicate of text."""
+        event_id = self._by_fingerprint.get(text_fingerprint(text))
+        if event_id:
+            return event_id
+        tokens = _tokens(text)
+        if len(tokens) < _MIN_TOKENS_FOR_NEAR_MATCH:
+            return None
+        sig = simhash(tokens)
+        for candidate in self._by_date_key.get(_date_key(tokens), ()):
+            if bin(sig ^ self._entries[candidate][1]).count("1") <= NEAR_DUPLICATE_DISTANCE:
+                return candidate
+        return None
+
+    def retain(self, live_ids: set[str], added_before: datetime):
+        """Drop entries added before added_before that are no longer in live_ids."""
+        stale = [
+            eid for eid, (*_, at) in self._entries.items()
+            if eid not in live_ids and at < added_before
+        ]
+        for event_id in stale:
+            self.remove(event_id)
+
+
+index = DuplicateIndex()
+
+
+def find_duplicate(text: str) -> Optional[str]:
+    return index.find(text)
+
+
+def remember_event(event_id: str, text: str):
+    index.add(event_id, text)
+
+
+def forget_event(event_id: str):
+    index.remove(event_id)
+
+
+def window_start(now: datetime | None = None) -> datetime:
+    """Oldest created_at a repost is still matched against (DEDUP_WINDOW_DAYS back)."""
+    return (now or datetime.now(timezone.utc)) - timedelta(days=settings.DEDUP_WINDOW_DAYS)
+
+
+async def warm_duplicate_index():
+    """Sync the index with events posted within DEDUP_WINDOW_DAYS.
+
+    Runs at startup and periodically, so posts handled by other replicas are picked
+    up and deleted or aged-out events stop blocking reposts. Entries added locally
+    while the query was in flight are kept.
+    """
+    started = datetime.now(timezone.utc)
+    cutoff = window_start(started)
+    rows = await get_recent_events_for_dedup(cutoff)
+    live_ids = set()
+    for row in rows:
+        live_ids.add(row["event_id"])
+        if row["event_id"] in index or not row.get("text"):
+            continue
+        created_at = cutoff
+        if row.get("created_at"):
+            try:
+                created_at = datetime.fromisoformat(row["created_at"])
+            except (ValueError, TypeError):
+                pass
+        index.add(row["event_id"], row["text"], created_at)
+    index.retain(live_ids, started)
+    logger.info("Duplicate index synced: %d events", len(index))
@@ -1,7 +1,11 @@
+import logging
+
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 
 from app.services.calendar import build_gcal_url
+from app.services.throttle import acquire_send
 
+logger = logging.getLogger(__name__)
 
 def build_event_text(event: dict) -> str:
     lines = []
@@ -54,10 +58,34 @@ async def send_event_card(bot: Bot, chat_id: int, event: dict):
     from app.services.supabase_client import get_rsvp_counts
 
     text = build_event_text(event)
-    count = get_rsvp_counts(event["event_id"])
-    bot_username = (await bot.get_me()).username or ""
-    keyboard = build_event_keyboard(event, rsvp_count=count, bot_username=bot_username)
+    count = await get_rsvp_counts(event["event_id"])
+    # bot.username is filled by Application.initialize(), so this is no API call
+    keyboard = build_event_keyboard(event, rsvp_count=count, bot_username=bot.username or "")
+    await acquire_send(chat_id)
+    await _send_card(bot, chat_id, event, text, keyboard)
+
+
+async def send_event_cards(bot: Bot, chat_id: int, events: list[dict]):
+    """Send several cards with one RSVP-count query for the whole batch.
+
+    Cards go out one at a time so the chat shows them in rank order, paced by the
+    chat's rate limit; a failed card is logged and doesn't stop the rest.
+    """
+    from app.services.supabase_client import get_rsvp_counts_bulk
+
+    counts = await get_rsvp_counts_bulk([e["event_id"] for e in events])
+    for event in events:
+        keyboard = build_event_keyboard(
+            event, rsvp_count=counts.get(event["event_id"], 0), bot_username=bot.username or ""
+        )
+        try:
+            await acquire_send(chat_id)
+            await _send_card(bot, chat_id, event, build_event_text(event), keyboard)
+        except Exception as e:
+            logger.error("Failed to send card for event %s to %s: %s", event["event_id"], chat_id, e)
+
 
+async def _send_card(bot: Bot, chat_id: int, event: dict, text: str, keyboard: InlineKeyboardMarkup):
     image_url = event.get("image_url")
     if not image_url:
         images = event.get("event_images")
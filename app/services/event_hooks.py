@@ -0,0 +1,34 @@
+"""Keeps the in-process indexes and caches in step with event writes.
+
+Handlers call these after the corresponding database write succeeds.
+"""
+from datetime import datetime
+
+from app.services import categories, dedup, reminder_timer, search_index, trending
+
+
+def on_event_created(event: dict, category: dict):
+    dedup.remember_event(event["event_id"], event["text"])
+    categories.add_category(category)
+    search_index.index_event(event, [category["name"]])
+
+
+def on_event_updated(event: dict):
+    search_index.index_event(event)
+
+
+def on_event_deleted(event_id: str, cancelled_reminders: list[str]):
+    dedup.forget_event(event_id)
+    trending.discard(event_id)
+    search_index.drop_event(event_id)
+    for reminder_id in cancelled_reminders:
+        reminder_timer.unschedule(reminder_id)
+
+
+def on_event_rescheduled(event: dict, cancelled_reminders: list[str], scheduled_reminders: list[dict]):
+    """The event's date changed: its pending reminders were replaced by re-timed ones."""
+    search_index.index_event(event)
+    for reminder_id in cancelled_reminders:
+        reminder_timer.unschedule(reminder_id)
+    for row in scheduled_reminders:
+        reminder_timer.schedule(row["reminder_id"], datetime.fromisoformat(row["remind_at"]))
@@ -1,11 +1,16 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Optional
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional
 
 from google import genai
 from google.genai import types
 
 from app.config import settings
+from app.services.cache import MISSING, TTLCache
+from app.services.supabase_client import get_cached_extraction, save_cached_extraction
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +18,8 @@ client = genai.Client(api_key=settings.GEMINI_API_KEY)
 
 MODEL = "gemini-3-flash-preview"
 
+EMPTY_RESULT = {"date": None, "title": None, "end_date": None, "location": None, "description": None}
+
 TEXT_EXTRACTION_PROMPT = """Extract event details from the following message text.
 Return a JSON object with these fields:
 - title: string (short event title, or null if not determinable)
@@ -35,49 +42,161 @@ Return a JSON object with these fields:
 
 Only return valid JSON. Use null for fields that cannot be determined."""
 
+# Caps in-flight Gemini calls; extra posts wait here instead of piling onto the API
+_slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
 
-def parse_text(text: str) -> dict:
-    response = client.models.generate_content(
-        model=MODEL,
-        contents=text + "\n\n" + TEXT_EXTRACTION_PROMPT,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-        ),
-    )
+_stats = {
+    "in_flight": 0,
+    "queued": 0,
+    "peak_queued": 0,
+    "completed": 0,
+    "timeouts": 0,
+    "errors": 0,
+}
+
+
+# Hot layer in front of the extraction_cache table
+_cache = TTLCache(
+    maxsize=settings.EXTRACTION_CACHE_SIZE,
+    ttl=settings.EXTRACTION_CACHE_TTL_HOURS * 3600,
+)
+
+
+def extraction_stats() -> dict:
+    """Snapshot of extraction queue depth, call outcomes and cache hit rate."""
+    return {**_stats, "max_concurrency": settings.GEMINI_MAX_CONCURRENCY, "cache": _cache.stats()}
+
+
+def text_cache_key(text: str) -> str:
+    """Key for a message text; whitespace-only differences map to the same entry."""
+    normalised = " ".join(text.split())
+    return "text:" + hashlib.sha256(normalised.encode()).hexdigest()
+
+
+def image_cache_key(image_bytes: bytes) -> str:
+    return "image:" + hashlib.sha256(image_bytes).hexdigest()
+
+
+async def _cache_lookup(cache_key: str) -> Optional[dict]:
+    cached = _cache.get(cache_key)
+    if cached is not MISSING:
+        return dict(cached)
+    try:
+        stored = await get_cached_extraction(
+            cache_key, timedelta(hours=settings.EXTRACTION_CACHE_TTL_HOURS)
+        )
+    except Exception as e:
+        logger.warning("Extraction cache lookup failed for %s: %s", cache_key, e)
+        return None
+    if stored is None:
+        return None
+    _cache.set(cache_key, stored)
+    return dict(stored)
+
+
+async def _cache_store(cache_key: str, parsed: dict):
+    _cache.set(cache_key, parsed)
+    try:
+        await save_cached_extraction(cache_key, parsed)
+    except Exception as e:
+        logger.warning("Extraction cache write failed for %s: %s", cache_key, e)
+
+
+async def _generate(contents) -> Optional[str]:
+    """Run one generate_content call under the concurrency cap.
+
+    Returns the response text, or None if the call timed out.
+    """
+    _stats["queued"] += 1
+    _stats["peak_queued"] = max(_stats["peak_queued"], _stats["queued"])
+    async with _slots:
+        _stats["queued"] -= 1
+        _stats["in_flight"] += 1
+        try:
+            response = await asyncio.wait_for(
+                client.aio.models.generate_content(
+                    model=MODEL,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        response_mime_type="application/json",
+                    ),
+                ),
+                timeout=settings.GEMINI_TIMEOUT_SECONDS,
+            )
+            _stats["completed"] += 1
+            return response.text
+        except asyncio.TimeoutError:
+            _stats["timeouts"] += 1
+            logger.error("Gemini call timed out after %ss", settings.GEMINI_TIMEOUT_SECONDS)
+            return None
+        except Exception:
+            _stats["errors"] += 1
+            raise
+        finally:
+            _stats["in_flight"] -= 1
+
+
+async def _extract(cache_key: str, contents, kind: str) -> dict:
+    """Return the cached extraction for cache_key, or call Gemini and cache the result.
+
+    Timeouts and unparseable responses are not cached, so the next repost retries.
+    """
+    cached = await _cache_lookup(cache_key)
+    if cached is not None:
+        logger.info("Extraction cache hit for %s", cache_key)
+        return cached
+
+    response_text = await _generate(contents)
+    if response_text is None:
+        return dict(EMPTY_RESULT)
     try:
-        return json.loads(response.text)
+        parsed = json.loads(response_text)
     except (json.JSONDecodeError, ValueError):
-        logger.error("Failed to parse Gemini text response: %s", response.text)
-        return {"date": None, "title": None, "end_date": None, "location": None, "description": None}
+        logger.error("Failed to parse Gemini %s response: %s", kind, response_text)
+        return dict(EMPTY_RESULT)
+    if not isinstance(parsed, dict):
+        logger.error("Unexpected Gemini %s response: %s", kind, response_text)
+        return dict(EMPTY_RESULT)
+
+    await _cache_store(cache_key, parsed)
+    return dict(parsed)
+
+
+async def parse_text(text: str) -> dict:
+    return await _extract(
+        text_cache_key(text),
+        text + "\n\n" + TEXT_EXTRACTION_PROMPT,
+        "text",
+    )
 
 
-def parse_image(image_bytes: bytes) -> dict:
-    response = client.models.generate_content(
-        model=MODEL,
-        contents=[
+async def parse_image(image_bytes: bytes) -> dict:
+    return await _extract(
+        image_cache_key(image_bytes),
+        [
             types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"),
             IMAGE_EXTRACTION_PROMPT,
         ],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-        ),
+        "image",
     )
-    try:
-        return json.loads(response.text)
-    except (json.JSONDecodeError, ValueError):
-        logger.error("Failed to parse Gemini image response: %s", response.text)
-        return {"date": None, "title": None, "end_date": None, "location": None, "description": None}
 
 
-def parse_event(text: str, image_bytes: Optional[bytes] = None) -> dict:
-    """Extract event details: text first, image fallback for missing fields."""
-    result = parse_text(text)
+async def parse_event(
+    text: str,
+    load_image: Optional[Callable[[], Awaitable[bytes]]] = None,
+) -> dict:
+    """Extract event details: text first, image fallback for missing fields.
+
+    load_image is only awaited when the fallback is needed, so posts whose text
+    has a date never download their poster here.
+    """
+    result = await parse_text(text)
 
-    if image_bytes:
+    if load_image:
         # If date is missing from text, try image
         if result.get("date") is None:
             logger.info("Date not found in text, falling back to image parsing")
-            image_result = parse_image(image_bytes)
+            image_result = await parse_image(await load_image())
             # Fill in missing fields from image result
             for key in ("date", "title", "end_date", "location", "description"):
                 if result.get(key) is None and image_result.get(key) is not None:
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+from telegram import Bot
+
+from app.config import settings
+from app.services.supabase_client import save_event_image, update_event_refs, upload_image
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 2.0  # seconds; doubles on each retry
+
+
+@dataclass
+class PosterJob:
+    event_id: str
+    file_id: str
+    image_bytes: Optional[bytes] = None
+    # Set once the upload succeeds, so a retry after a DB failure doesn't re-upload
+    url: Optional[str] = None
+
+
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+_stats = {"processed": 0, "retries": 0, "failed": 0, "dropped": 0}
+
+
+def media_stats() -> dict:
+    return {**_stats, "queued": _queue.qsize() if _queue else 0, "workers": len(_workers)}
+
+
+def start_media_workers(bot: Bot):
+    """Start the poster upload workers. Called once from the FastAPI lifespan."""
+    global _queue
+    _queue = asyncio.Queue(maxsize=settings.MEDIA_QUEUE_SIZE)
+    for i in range(settings.MEDIA_WORKERS):
+        _workers.append(asyncio.create_task(_worker(bot), name=f"poster-worker-{i}"))
+    logger.info("Started %d poster upload workers", len(_workers))
+
+
+async def stop_media_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    if _queue and _queue.qsize():
+        logger.warning("Dropped %d pending poster uploads on shutdown", _queue.qsize())
+
+
+def enqueue_poster(event_id: str, file_id: str, image_bytes: Optional[bytes] = None):
+    """Queue a poster for storage upload. Never waits: if the queue is full the poster
+    is dropped (the card keeps Telegram's copy), so a backlog can't delay the reply."""
+    try:
+        _queue.put_nowait(PosterJob(event_id=event_id, file_id=file_id, image_bytes=image_bytes))
+    except asyncio.QueueFull:
+        _stats["dropped"] += 1
+        logger.warning("Poster queue full, not storing poster for event %s", event_id)
+
+
+async def _worker(bot: Bot):
+    while True:
+        job = await _queue.get()
+        try:
+            await _process_with_retries(bot, job)
+        finally:
+            _queue.task_done()
+
+
+async def _process_with_retries(bot: Bot, job: PosterJob):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            await _process(bot, job)
+            _stats["processed"] += 1
+            return
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS:
+                _stats["failed"] += 1
+                logger.error("Giving up on poster for event %s after %d attempts: %s", job.event_id, attempt, e)
+                return
+            _stats["retries"] += 1
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            logger.warning("Poster upload for event %s failed (%s), retrying in %.0fs", job.event_id, e, delay)
+            await asyncio.sleep(delay)
+
+
+async def _process(bot: Bot, job: PosterJob):
+    if job.url is None:
+        if job.image_bytes is None:
+            file = await bot.get_file(job.file_id)
+            job.image_bytes = bytes(await file.download_as_bytearray())
+        data, extension = await asyncio.to_thread(_prepare_image, job.image_bytes)
+        job.url = await upload_image(data, extension)
+    ei = await save_event_image(job.event_id, job.url)
+    await update_event_refs(job.event_id, ei_id=ei["ei_id"])
+    logger.info("Stored poster for event %s", job.event_id)
+
+
+def _prepare_image(image_bytes: bytes) -> tuple[bytes, str]:
+    """Downscale to POSTER_MAX_DIMENSION and transcode to WebP, per settings.
+
+    Returns the original JPEG untouched if both are disabled or Pillow can't read it.
+    """
+    max_dim = settings.POSTER_MAX_DIMENSION
+    quality = settings.POSTER_WEBP_QUALITY
+    if not max_dim and not quality:
+        return image_bytes, "jpg"
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img = img.convert("RGB")
+            if max_dim and max(img.size) > max_dim:
+                img.thumbnail((max_dim, max_dim))
+            out = io.BytesIO()
+            if quality:
+                img.save(out, format="WEBP", quality=quality)
+                return out.getvalue(), "webp"
+            img.save(out, format="JPEG", quality=90)
+            return out.getvalue(), "jpg"
+    except Exception as e:
+        logger.warning("Could not transcode poster, uploading original: %s", e)
+        return image_bytes, "jpg"
@@ -0,0 +1,108 @@
+"""In-process reminder timer.
+
+Reminders due within the next LOOKAHEAD are kept in a heap and fired at their
+remind_at, instead of waiting for the next DB poll. The window is reloaded from the
+DB on a schedule, new reminders are added as they are created, and firing goes
+through the same claim RPC as the sweep, so several replicas (or the sweep) can
+hold the same reminder and it is still sent once.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.services.supabase_client import get_pending_reminders
+
+logger = logging.getLogger(__name__)
+
+# Reminders further out than this are left in the DB until a later reload picks them up
+LOOKAHEAD = timedelta(hours=3)
+# Upper bound on a single sleep, so a wall-clock jump can't strand the heap
+MAX_SLEEP_SECONDS = 60.0
+# Fire this long after remind_at: the claim only takes reminders the DB clock sees as due,
+# so a replica clock running slightly ahead would otherwise leave them to the sweep
+FIRE_DELAY = timedelta(seconds=2)
+
+_heap: list[tuple[datetime, str]] = []
+# reminder_id -> remind_at for live entries; heap entries not matching it are stale
+_pending: dict[str, datetime] = {}
+_wake = asyncio.Event()
+_fire: Optional[Callable[[list[str]], Awaitable[None]]] = None
+_task: Optional[asyncio.Task] = None
+_firing: set[asyncio.Task] = set()
+_stats = {"fired": 0, "loaded": 0}
+
+
+def timer_stats() -> dict:
+    return {**_stats, "pending": len(_pending)}
+
+
+def start_reminder_timer(fire: Callable[[list[str]], Awaitable[None]]):
+    """Start the timer loop. fire(reminder_ids) claims and sends reminders that fell due."""
+    global _fire, _task
+    _fire = fire
+    _task = asyncio.create_task(_run(), name="reminder-timer")
+
+
+async def stop_reminder_timer():
+    tasks = [t for t in (_task, *_firing) if t]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def load_reminder_window():
+    """Load unsent reminders due within LOOKAHEAD. Runs at startup and on a schedule."""
+    rows = await get_pending_reminders(datetime.now(timezone.utc) + LOOKAHEAD)
+    for row in rows:
+        schedule(row["reminder_id"], datetime.fromisoformat(row["remind_at"]))
+    _stats["loaded"] = len(rows)
+    logger.info("Reminder timer holds %d reminders", len(_pending))
+
+
+def schedule(reminder_id: str, remind_at: datetime):
+    """Track a reminder if it falls inside the current window."""
+    if remind_at > datetime.now(timezone.utc) + LOOKAHEAD or _pending.get(reminder_id) == remind_at:
+        return
+    _pending[reminder_id] = remind_at
+    heapq.heappush(_heap, (remind_at, reminder_id))
+    if _heap[0][1] == reminder_id:
+        _wake.set()  # New earliest deadline
+
+
+def unschedule(reminder_id: str):
+    _pending.pop(reminder_id, None)
+
+
+async def _run():
+    while True:
+        _wake.clear()
+        now = datetime.now(timezone.utc) - FIRE_DELAY
+        due = []
+        while _heap and _heap[0][0] <= now:
+            remind_at, reminder_id = heapq.heappop(_heap)
+            if _pending.get(reminder_id) == remind_at:
+                del _pending[reminder_id]
+                due.append(reminder_id)
+        if due:
+            task = asyncio.create_task(_fire_due(due))
+            _firing.add(task)
+            task.add_done_callback(_firing.discard)
+
+        timeout = MAX_SLEEP_SECONDS
+        if _heap:
+            timeout = min(timeout, max((_heap[0][0] - now).total_seconds(), 0))
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _fire_due(reminder_ids: list[str]):
+    try:
+        await _fire(reminder_ids)
+        _stats["fired"] += len(reminder_ids)
+    except Exception as e:
+        # Unsent reminders are picked up by the reconciliation sweep
+        logger.error("Failed to fire %d reminders: %s", len(reminder_ids), e)
@@ -1,50 +1,161 @@
+import functools
 import logging
+import time
+from datetime import datetime, timezone
 
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.config import SGT
+from app.services.coordination import HEARTBEAT_SECONDS, is_leader, renew_leadership
 
 logger = logging.getLogger(__name__)
 
-scheduler = AsyncIOScheduler()
+# One run of a job at a time; a backlog of missed runs collapses into one, and a run
+# that starts up to 30s late still goes ahead. Catch-up jobs replay missed minutes themselves.
+scheduler = AsyncIOScheduler(job_defaults={
+    "coalesce": True,
+    "max_instances": 1,
+    "misfire_grace_time": 30,
+})
+
+_job_stats: dict[str, dict] = {}
+
+
+def job_stats() -> dict:
+    """Per-job run counts, durations, start lag and job-reported gauges."""
+    return {job_id: dict(stats) for job_id, stats in _job_stats.items()}
+
+
+def record_job_metric(job_id: str, name: str, value):
+    """Let a job publish its own gauge (e.g. how many slots it is catching up)."""
+    _stats_for(job_id)[name] = value
+
+
+def _stats_for(job_id: str) -> dict:
+    return _job_stats.setdefault(job_id, {"runs": 0, "failures": 0, "missed": 0})
+
+
+def _instrumented(job_id: str, func, leader_only: bool):
+    @functools.wraps(func)
+    async def run(*args, **kwargs):
+        stats = _stats_for(job_id)
+        if leader_only and not is_leader():
+            stats["skipped_not_leader"] = stats.get("skipped_not_leader", 0) + 1
+            return
+        started = time.monotonic()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            stats["failures"] += 1
+            raise
+        finally:
+            duration = round(time.monotonic() - started, 3)
+            stats["runs"] += 1
+            stats["last_duration_s"] = duration
+            stats["max_duration_s"] = max(stats.get("max_duration_s", 0), duration)
+    return run
+
+
+def _on_job_event(event):
+    stats = _stats_for(event.job_id)
+    if event.code == EVENT_JOB_MISSED:
+        stats["missed"] += 1
+        logger.warning("Job %s missed its run at %s", event.job_id, event.scheduled_run_time)
+        return
+    # Submitted: how far behind schedule the run is starting
+    lag = datetime.now(timezone.utc) - event.scheduled_run_times[-1]
+    stats["last_lag_s"] = round(lag.total_seconds(), 3)
+
+
+def _add_job(func, trigger, job_id: str, leader_only: bool = False, **kwargs):
+    """Register a job. leader_only jobs are skipped on replicas not holding the scheduler lease."""
+    scheduler.add_job(
+        _instrumented(job_id, func, leader_only),
+        trigger,
+        id=job_id,
+        replace_existing=True,
+        **kwargs,
+    )
 
 
 def init_scheduler(bot):
     """Initialize scheduler with background jobs."""
     from app.jobs.digest import check_newsletter_due
-    from app.jobs.newsletter import send_weekly_newsletter
+    from app.jobs.maintenance import prune_caches
+    from app.jobs.newsletter import resume_weekly_newsletter, send_weekly_newsletter
     from app.jobs.reminders import check_due_reminders
+    from app.middleware.rate_limit import sync_rate_limit_state
+    from app.services.categories import load_categories
+    from app.services.search_index import load_search_index
+    from app.services.dedup import warm_duplicate_index
+    from app.services.reminder_timer import load_reminder_window
+    from app.services.trending import refresh_trending
 
-    scheduler.add_job(
-        check_due_reminders,
+    scheduler.add_listener(_on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED)
+
+    # Every replica competes for the lease; the first heartbeat runs immediately
+    _add_job(
+        renew_leadership,
         "interval",
-        minutes=1,
-        args=[bot],
-        id="check_reminders",
-        replace_existing=True,
+        "leader_heartbeat",
+        seconds=HEARTBEAT_SECONDS,
+        next_run_time=datetime.now(SGT),
     )
 
-    scheduler.add_job(
-        check_newsletter_due,
+    # Reminders fire from the in-process timer; this sweep only reconciles what it missed
+    _add_job(check_due_reminders, "interval", "check_reminders", leader_only=True, minutes=15, args=[bot])
+
+    # Runs everywhere: each replica's timer holds reminders due within its lookahead
+    _add_job(
+        load_reminder_window,
         "interval",
-        minutes=1,
-        args=[bot],
-        id="check_newsletter",
-        replace_existing=True,
+        "load_reminder_window",
+        hours=1,
+        next_run_time=datetime.now(SGT),
     )
 
-    scheduler.add_job(
+    _add_job(check_newsletter_due, "interval", "check_newsletter", leader_only=True, minutes=1, args=[bot])
+
+    _add_job(
         send_weekly_newsletter,
         "cron",
+        "weekly_newsletter",
+        leader_only=True,
         day_of_week="sun",
         hour=18,
         minute=0,
         timezone=SGT,
         args=[bot],
-        id="weekly_newsletter",
-        replace_existing=True,
+        # Still send if the process was busy around 18:00
+        misfire_grace_time=6 * 3600,
     )
 
+    # Finishes a roundup whose replica crashed or restarted mid-send
+    _add_job(resume_weekly_newsletter, "interval", "resume_weekly_newsletter", leader_only=True, minutes=15, args=[bot])
+
+    # Runs everywhere: each replica reloads its own cache, only the leader refreshes the view
+    _add_job(refresh_trending, "interval", "refresh_trending", minutes=5)
+
+    _add_job(warm_duplicate_index, "interval", "sync_duplicate_index", minutes=15)
+
+    # Runs everywhere: shares limiter state between replicas and restores it after a restart
+    _add_job(
+        sync_rate_limit_state,
+        "interval",
+        "sync_rate_limits",
+        seconds=30,
+        next_run_time=datetime.now(SGT),
+    )
+
+    # Runs everywhere: reconciles counts changed on other replicas
+    _add_job(load_categories, "interval", "reconcile_categories", minutes=15)
+
+    # Runs everywhere: rebuilds this replica's search index and drops events that have passed
+    _add_job(load_search_index, "interval", "reconcile_search_index", minutes=15)
+
+    _add_job(prune_caches, "cron", "prune_caches", leader_only=True, hour=4, minute=0, timezone=SGT)
+
     scheduler.start()
     logger.info("Scheduler started with reminder and newsletter jobs")
 
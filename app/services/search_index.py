@@ -0,0 +1,194 @@
+"""In-process BM25 index of upcoming events, so most /find queries skip the DB.
+
+Holds every upcoming, non-deleted event with its tokens (title weighted double),
+hashtags and category names. Kept current through event_hooks on create, edit and
+delete, and rebuilt from the DB on a schedule, which also drops events that have
+passed. Historic and deep searches still go to the search_events RPC.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from app.services.supabase_client import get_upcoming_events_for_index
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "by", "for", "from", "in", "is", "of", "on", "or", "the", "to", "with", "unipulse",
+})
+_TOKEN_RE = re.compile(r"\w+")
+# Poster fields the event card reads; rows from events alone don't carry them
+_IMAGE_FIELDS = ("image_url", "event_images")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+class _Doc:
+    __slots__ = ("event", "terms", "length", "categories", "date")
+
+    def __init__(self, event: dict, categories: Iterable[str]):
+        self.event = event
+        terms = Counter(tokenize(event.get("title")) * 2)
+        for field in ("location", "description", "text"):
+            terms.update(tokenize(event.get(field)))
+        self.terms = terms
+        self.length = sum(terms.values())
+        self.categories = frozenset(c.lower() for c in categories)
+        self.date = _parse_date(event.get("date"))
+
+
+class SearchIndex:
+    """Inverted index over upcoming events with BM25 ranking."""
+
+    def __init__(self):
+        self._docs: dict[str, _Doc] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._by_category: dict[str, set[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, event: dict, categories: Optional[Iterable[str]] = None):
+        """Index (or re-index) an event.
+
+        categories=None keeps the ones already indexed, and a row without poster fields
+        (e.g. one returned by an edit) keeps the poster of the indexed version.
+        """
+        event_id = event["event_id"]
+        event = dict(event)  # Own copy: poster fields may be carried over below
+        previous = self._docs.get(event_id)
+        if categories is None:
+            categories = previous.categories if previous else ()
+        if previous:
+            for field in _IMAGE_FIELDS:
+                if not event.get(field) and previous.event.get(field):
+                    event[field] = previous.event[field]
+        self.remove(event_id)
+
+        doc = _Doc(event, categories)
+        if event.get("is_deleted") or doc.date is None or doc.date < datetime.now(timezone.utc):
+            return  # Only upcoming events are indexed
+        self._docs[event_id] = doc
+        self._total_length += doc.length
+        for term, tf in doc.terms.items():
+            self._postings.setdefault(term, {})[event_id] = tf
+        for category in doc.categories:
+            self._by_category.setdefault(category, set()).add(event_id)
+
+    def remove(self, event_id: str):
+        doc = self._docs.pop(event_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings[term]
+            postings.pop(event_id, None)
+            if not postings:
+                del self._postings[term]
+        for category in doc.categories:
+            members = self._by_category[category]
+            members.discard(event_id)
+            if not members:
+                del self._by_category[category]
+
+    def get(self, event_id: str) -> Optional[dict]:
+        doc = self._docs.get(event_id)
+        return doc.event if doc else None
+
+    def search(self, query: Optional[str] = None, category: Optional[str] = None, limit: int = 50) -> list[str]:
+        """Event ids, best first. A category alone lists events soonest first."""
+        now = datetime.now(timezone.utc)
+        allowed = self._by_category.get(category.lower(), set()) if category else None
+
+        terms = tokenize(query)
+        if not terms:
+            if allowed is None:
+                return []
+            ids = [i for i in allowed if self._docs[i].date >= now]
+            return sorted(ids, key=lambda i: (self._docs[i].date, i))[:limit]
+
+        n = len(self._docs)
+        avg_length = self._total_length / n if n else 0
+        scores: dict[str, float] = {}
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for event_id, tf in postings.items():
+                if allowed is not None and event_id not in allowed:
+                    continue
+                doc = self._docs[event_id]
+                norm = tf + K1 * (1 - B + B * doc.length / avg_length)
+                scores[event_id] = scores.get(event_id, 0.0) + idf * tf * (K1 + 1) / norm
+
+        ranked = [i for i in scores if self._docs[i].date >= now]
+        return sorted(ranked, key=lambda i: (-scores[i], self._docs[i].date, i))[:limit]
+
+    def replace_all(self, rows: list[dict]):
+        fresh = SearchIndex()
+        for row in rows:
+            fresh.upsert(row["event"], row["categories"])
+        self._docs, self._postings, self._by_category, self._total_length = (
+            fresh._docs, fresh._postings, fresh._by_category, fresh._total_length,
+        )
+
+
+def _parse_date(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+
+
+index = SearchIndex()
+_loaded = False
+# Changes made while a rebuild is reading the DB, replayed on top of its snapshot
+_journal: Optional[list[tuple]] = None
+
+
+def is_ready() -> bool:
+    return _loaded
+
+
+def index_event(event: dict, categories: Optional[Iterable[str]] = None):
+    """Add or refresh an event. categories=None keeps whatever is already indexed for it."""
+    index.upsert(event, categories)
+    if _journal is not None:
+        _journal.append((event, categories))
+
+
+def drop_event(event_id: str):
+    index.remove(event_id)
+    if _journal is not None:
+        _journal.append((event_id, None))
+
+
+async def load_search_index():
+    """Rebuild the index from the DB. Runs at startup and on a schedule."""
+    global _loaded, _journal
+    _journal = []
+    try:
+        rows = await get_upcoming_events_for_index(datetime.now(timezone.utc))
+        index.replace_all(rows)
+        for item, categories in _journal:
+            if isinstance(item, dict):
+                index.upsert(item, categories)
+            else:
+                index.remove(item)
+    finally:
+        _journal = None
+    _loaded = True
+    logger.info("Search index loaded with %d upcoming events", len(index))
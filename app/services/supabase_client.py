@@ -1,23 +1,58 @@
 import uuid
-from datetime import datetime, timezone
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, List, Optional
 
-from supabase import create_client, Client
+from supabase import AsyncClient, acreate_client
 
 from app.config import settings
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SECRET_KEY)
+_client: Optional[AsyncClient] = None
+
+
+async def init_supabase() -> AsyncClient:
+    """Create the shared async client. Called once from the FastAPI lifespan."""
+    global _client
+    if _client is None:
+        _client = await acreate_client(settings.SUPABASE_URL, settings.SUPABASE_SECRET_KEY)
+    return _client
+
+
+def get_supabase() -> AsyncClient:
+    """Return the shared async client; every query goes through this one connection pool."""
+    if _client is None:
+        raise RuntimeError("Supabase client is not initialised; call init_supabase() first")
+    return _client
+
+
+# PostgREST caps every response at this many rows
+PAGE_SIZE = 1000
+
+
+async def _paged(build_query: Callable) -> AsyncIterator[dict]:
+    """Yield every row of a query, one PAGE_SIZE range at a time.
+
+    build_query() must return a fresh, stably ordered builder: range() adds to a builder's params
+    rather than replacing them, so one builder cannot be reused across pages.
+    """
+    offset = 0
+    while True:
+        result = await build_query().range(offset, offset + PAGE_SIZE - 1).execute()
+        for row in result.data:
+            yield row
+        if len(result.data) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
 
 
 # --- Auth ---
 
-def send_verification_email(email: str, redirect_url: str, tele_id: int, tele_handle: str):
+async def send_verification_email(email: str, redirect_url: str, tele_id: int, tele_handle: str):
     """Send a confirmation email for NUS identity verification.
 
     Stores tele_id and tele_handle in Supabase Auth user metadata so they
     are available when the confirmation link is clicked — no separate pending table needed.
     """
-    supabase.auth.sign_up({
+    await get_supabase().auth.sign_up({
         "email": email,
         "password": str(uuid.uuid4()),
         "options": {
@@ -30,111 +65,187 @@ def send_verification_email(email: str, redirect_url: str, tele_id: int, tele_ha
     })
 
 
-def verify_access_token(access_token: str):
+async def verify_access_token(access_token: str):
     """Verify an access token and return the auth user."""
-    return supabase.auth.get_user(access_token).user
+    return (await get_supabase().auth.get_user(access_token)).user
+
+
+async def verify_email_otp(email: str, token_hash: str, token_type: str = "email"):
+    """Exchange a confirmation-link token_hash for the auth user."""
+    result = await get_supabase().auth.verify_otp({"email": email, "token_hash": token_hash, "type": token_type})
+    return result.user if result else None
+
+
+async def upsert_account(account_id: str, tele_id: int, tele_handle: str):
+    await get_supabase().table("accounts").upsert({
+        "account_id": account_id,
+        "tele_id": tele_id,
+        "tele_handle": tele_handle,
+    }, on_conflict="account_id").execute()
 
 
 # --- Events ---
 
-def get_event(event_id: str) -> Optional[dict]:
-    result = supabase.table("events").select("*").eq("event_id", event_id).maybe_single().execute()
-    return result.data
+# Everything callers read off an event row; leaves out text_hash and the search_vector tsvector
+EVENT_COLUMNS = (
+    "event_id, text, title, date, end_date, location, description, "
+    "fk_account_id, fk_ec_id, fk_ei_id, is_deleted, created_at"
+)
 
 
-def get_event_by_hash(text_hash: str) -> Optional[dict]:
-    result = supabase.table("events").select("event_id").eq("text_hash", text_hash).maybe_single().execute()
-    return result.data
+async def get_event(event_id: str) -> Optional[dict]:
+    result = await (
+        get_supabase().table("events")
+        .select(EVENT_COLUMNS)
+        .eq("event_id", event_id)
+        .maybe_single()
+        .execute()
+    )
+    return result.data if result else None
+
+
+async def get_recent_events_for_dedup(since: datetime) -> List[dict]:
+    """Texts of non-deleted events created since the given time, for the duplicate index."""
+    return [row async for row in _paged(lambda: (
+        get_supabase().table("events")
+        .select("event_id, text, created_at")
+        .eq("is_deleted", False)
+        .gte("created_at", since.isoformat())
+        .order("event_id")
+    ))]
 
 
-def save_event(
+async def ingest_event(
     text: str,
+    text_hash: str,
+    account_id: str,
+    tags: List[str],
+    max_posts_per_hour: int,
+    duplicate_since: datetime,
     date: Optional[str] = None,
-    account_id: Optional[str] = None,
     title: Optional[str] = None,
     location: Optional[str] = None,
     description: Optional[str] = None,
     end_date: Optional[str] = None,
-    text_hash: Optional[str] = None,
 ) -> dict:
-    data = {"text": text, "fk_account_id": account_id}
-    if date:
-        data["date"] = date
-    if title:
-        data["title"] = title
-    if location:
-        data["location"] = location
-    if description:
-        data["description"] = description
-    if end_date:
-        data["end_date"] = end_date
-    if text_hash:
-        data["text_hash"] = text_hash
-    result = supabase.table("events").insert(data).execute()
-    return result.data[0]
+    """Dedup, rate-limit, insert and categorise a post in one transaction.
+
+    Only events created since duplicate_since count as duplicates, matching the
+    window of the in-process duplicate index.
 
+    Returns {"status": "created" | "duplicate" | "rate_limited", "event": ..., "category": ...};
+    event and category are only present when status is "created".
+    """
+    result = await get_supabase().rpc("ingest_event", {
+        "p_account_id": account_id,
+        "p_text": text,
+        "p_text_hash": text_hash,
+        "p_tags": tags,
+        "p_date": date,
+        "p_end_date": end_date,
+        "p_title": title,
+        "p_location": location,
+        "p_description": description,
+        "p_max_posts_per_hour": max_posts_per_hour,
+        "p_since": duplicate_since.isoformat(),
+    }).execute()
+    return result.data
 
-def update_event_refs(event_id: str, ec_id: Optional[str] = None, ei_id: Optional[str] = None):
+
+async def count_recent_posts(account_id: str, window: timedelta = timedelta(hours=1)) -> int:
+    """Events the account created within the window (served by events_account_created_at_idx)."""
+    since = (datetime.now(timezone.utc) - window).isoformat()
+    result = await (
+        get_supabase().table("events")
+        .select("event_id", count="exact", head=True)
+        .eq("fk_account_id", account_id)
+        .gte("created_at", since)
+        .execute()
+    )
+    return result.count or 0
+
+
+async def update_event_refs(event_id: str, ec_id: Optional[str] = None, ei_id: Optional[str] = None):
     data = {}
     if ec_id:
         data["fk_ec_id"] = ec_id
     if ei_id:
         data["fk_ei_id"] = ei_id
     if data:
-        supabase.table("events").update(data).eq("event_id", event_id).execute()
+        await get_supabase().table("events").update(data).eq("event_id", event_id).execute()
 
 
 # --- Categories ---
 
-def get_or_create_category(name: str) -> dict:
-    result = supabase.table("categories").select("*").eq("name", name).maybe_single().execute()
-    if result.data:
-        return result.data
-    result = supabase.table("categories").insert({"name": name}).execute()
-    return result.data[0]
-
-
-def link_event_category(event_id: str, category_id: str) -> dict:
-    result = supabase.table("event_categories").insert({
-        "fk_event_id": event_id,
-        "fk_category_id": category_id,
-    }).execute()
-    return result.data[0]
+async def get_category_catalogue() -> List[dict]:
+    """Every category with its subscriber count: {category_id, name, subscribers}."""
+    result = await get_supabase().table("category_subscriber_counts").select("*").execute()
+    return result.data
 
 
 # --- Images ---
 
-def upload_image(image_bytes: bytes, extension: str = "jpg") -> str:
+async def upload_image(image_bytes: bytes, extension: str = "jpg") -> str:
     filename = f"{uuid.uuid4()}.{extension}"
-    supabase.storage.from_("event-posters").upload(
-        filename, image_bytes, {"content-type": f"image/{extension}"}
+    content_type = "image/jpeg" if extension == "jpg" else f"image/{extension}"
+    await get_supabase().storage.from_("event-posters").upload(
+        filename, image_bytes, {"content-type": content_type}
     )
     return f"{settings.SUPABASE_URL}/storage/v1/object/public/event-posters/{filename}"
 
 
-def save_event_image(event_id: str, url: str) -> dict:
-    result = supabase.table("event_images").insert({
+async def save_event_image(event_id: str, url: str) -> dict:
+    """Idempotent: saving the same event and URL again returns the existing row."""
+    result = await get_supabase().table("event_images").upsert({
         "fk_event_id": event_id,
         "url": url,
-    }).execute()
+    }, on_conflict="fk_event_id,url").execute()
     return result.data[0]
 
 
+# --- Extraction cache ---
+
+async def get_cached_extraction(cache_key: str, max_age: timedelta) -> Optional[dict]:
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    result = await (
+        get_supabase().table("extraction_cache")
+        .select("result")
+        .eq("cache_key", cache_key)
+        .gte("created_at", cutoff)
+        .maybe_single()
+        .execute()
+    )
+    return result.data["result"] if result else None
+
+
+async def save_cached_extraction(cache_key: str, parsed: dict):
+    await get_supabase().table("extraction_cache").upsert({
+        "cache_key": cache_key,
+        "result": parsed,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }, on_conflict="cache_key").execute()
+
+
+async def prune_extraction_cache(max_age: timedelta):
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    await get_supabase().table("extraction_cache").delete().lt("created_at", cutoff).execute()
+
+
 # --- RSVPs ---
 
-def upsert_rsvp(event_id: str, account_id: str) -> int:
+async def upsert_rsvp(event_id: str, account_id: str) -> int:
     """Toggle RSVP for this user+event. Returns updated total RSVP count."""
-    result = supabase.rpc("upsert_rsvp", {
+    result = await get_supabase().rpc("upsert_rsvp", {
         "p_event_id": event_id,
         "p_account_id": account_id,
     }).execute()
     return result.data or 0
 
 
-def get_rsvp_counts(event_id: str) -> int:
+async def get_rsvp_counts(event_id: str) -> int:
     """Return total RSVP count for an event."""
-    result = (
-        supabase.table("rsvps")
+    result = await (
+        get_supabase().table("rsvps")
         .select("rsvp_id", count="exact")
         .eq("fk_event_id", event_id)
         .execute()
@@ -142,116 +253,418 @@ def get_rsvp_counts(event_id: str) -> int:
     return result.count or 0
 
 
+async def get_rsvp_counts_bulk(event_ids: List[str]) -> dict:
+    """Return {event_id: rsvp_count} for many events in one query; missing ids have 0 RSVPs."""
+    if not event_ids:
+        return {}
+    result = await get_supabase().rpc("rsvp_counts", {"p_event_ids": event_ids}).execute()
+    return {row["event_id"]: row["rsvp_count"] for row in result.data}
+
+
 # --- Admins ---
 
-def is_verified_admin(tele_handle: str) -> bool:
+async def is_verified_admin(tele_handle: str) -> bool:
     """A user is verified if they have an account record (account_id FK'd to auth.users)."""
-    result = (
-        supabase.table("accounts")
+    result = await (
+        get_supabase().table("accounts")
         .select("account_id")
         .eq("tele_handle", tele_handle)
         .maybe_single()
         .execute()
     )
-    return result.data is not None
+    return result is not None
 
 
-def is_verified_admin_by_tele_id(tele_id: int) -> bool:
-    """A user is verified if they have an account record (account_id FK'd to auth.users)."""
-    result = (
-        supabase.table("accounts")
-        .select("account_id")
-        .eq("tele_id", tele_id)
-        .maybe_single()
+async def get_account_by_handle(tele_handle: str) -> Optional[dict]:
+    result = await get_supabase().table("accounts").select("*").eq("tele_handle", tele_handle).maybe_single().execute()
+    return result.data if result else None
+
+
+# --- Browse ---
+
+async def get_all_events(limit: int = 10) -> List[dict]:
+    now_iso = datetime.now(timezone.utc).isoformat()
+    result = await (
+        get_supabase().table("events")
+        .select(EVENT_COLUMNS)
+        .eq("is_deleted", False)
+        .gte("date", now_iso)
+        .order("date", desc=False)
+        .limit(limit)
         .execute()
     )
-    return result.data is not None
+    return result.data
 
 
-def get_account_by_handle(tele_handle: str) -> Optional[dict]:
-    result = supabase.table("accounts").select("*").eq("tele_handle", tele_handle).maybe_single().execute()
-    return result.data
+async def get_trending_events(limit: int = 5) -> List[dict]:
+    """Get upcoming events from the trending leaderboard, highest time-decayed RSVP score first.
+
+    Each event dict carries its leaderboard rsvp_count.
+    """
+    result = await get_supabase().rpc("get_trending_events", {"p_limit": limit}).execute()
+    return [{**row["event"], "rsvp_count": row["rsvp_count"]} for row in result.data]
 
 
-def get_account_by_tele_id(tele_id: int) -> Optional[dict]:
-    result = supabase.table("accounts").select("*").eq("tele_id", tele_id).maybe_single().execute()
+async def refresh_trending_leaderboard():
+    await get_supabase().rpc("refresh_trending_leaderboard", {}).execute()
+
+
+# --- Aggregates ---
+
+async def get_top_events_between(start: datetime, end: datetime, limit: int = 10) -> List[dict]:
+    """Most-RSVP'd non-deleted events dated within [start, end), each with its rsvp_count."""
+    result = await get_supabase().rpc("top_events_between", {
+        "p_from": start.isoformat(),
+        "p_to": end.isoformat(),
+        "p_limit": limit,
+    }).execute()
+    return [{**row["event"], "rsvp_count": row["rsvp_count"]} for row in result.data]
+
+
+async def get_upcoming_events_for_categories(
+    category_ids: List[str], start: datetime, end: datetime, limit: int = 10
+) -> List[dict]:
+    """Next `limit` non-deleted events per category dated within [start, end].
+
+    Returns rows of {"category_id": ..., "event": {event_id, title, text, date}}.
+    """
+    result = await get_supabase().rpc("upcoming_events_for_categories", {
+        "p_category_ids": category_ids,
+        "p_from": start.isoformat(),
+        "p_to": end.isoformat(),
+        "p_limit": limit,
+    }).execute()
     return result.data
 
 
-# --- Browse ---
+async def get_subscriber_tele_ids() -> List[int]:
+    """Distinct tele_ids of accounts subscribed to at least one category."""
+    return [row["tele_id"] async for row in _paged(lambda: get_supabase().rpc("subscriber_tele_ids", {}))]
+
+
+# --- Newsletter ---
+
+async def get_newsletter_accounts(start: str, end: str) -> List[dict]:
+    """Accounts whose newsletter_time (HH:MM:SS) is within [start, end].
 
-def get_all_events(limit: int = 10) -> List[dict]:
+    A window with start > end wraps past midnight.
+    """
+    def build_query():
+        query = get_supabase().table("accounts").select("account_id, tele_id, newsletter_time, last_newsletter_sent")
+        if start <= end:
+            query = query.gte("newsletter_time", start).lte("newsletter_time", end)
+        else:
+            query = query.or_(f"newsletter_time.gte.{start},newsletter_time.lte.{end}")
+        return query.order("account_id")
+
+    return [row async for row in _paged(build_query)]
+
+
+async def get_account_subscriptions(account_ids: List[str]) -> dict[str, set]:
+    """Subscribed category IDs per account, for accounts with at least one subscription."""
+    result = await (
+        get_supabase().table("account_categories")
+        .select("fk_account_id, fk_category_id")
+        .in_("fk_account_id", account_ids)
+        .execute()
+    )
+    subscriptions: dict[str, set] = {}
+    for row in result.data:
+        subscriptions.setdefault(row["fk_account_id"], set()).add(row["fk_category_id"])
+    return subscriptions
+
+
+async def set_last_newsletter_sent(account_ids: List[str], sent_at: datetime):
+    await (
+        get_supabase().table("accounts")
+        .update({"last_newsletter_sent": sent_at.isoformat()})
+        .in_("account_id", account_ids)
+        .execute()
+    )
+
+
+# --- Broadcast delivery state ---
+
+# Chat ids per IN() list, keeping the request URL well within PostgREST's limits
+_DELIVERY_LOOKUP_CHUNK = 200
+
+
+async def get_finished_deliveries(broadcast_key: str, chat_ids: List[int]) -> List[int]:
+    """Those of chat_ids already sent to (or permanently failed) under this broadcast key."""
+    finished = []
+    for i in range(0, len(chat_ids), _DELIVERY_LOOKUP_CHUNK):
+        result = await (
+            get_supabase().table("broadcast_deliveries")
+            .select("chat_id")
+            .eq("broadcast_key", broadcast_key)
+            .in_("chat_id", chat_ids[i:i + _DELIVERY_LOOKUP_CHUNK])
+            .in_("status", ["sent", "failed"])
+            .execute()
+        )
+        finished.extend(row["chat_id"] for row in result.data)
+    return finished
+
+
+async def record_deliveries(rows: List[dict]):
     now_iso = datetime.now(timezone.utc).isoformat()
-    result = (
-        supabase.table("events")
-        .select("*")
-        .eq("is_deleted", False)
-        .gte("date", now_iso)
-        .order("date", desc=False)
-        .limit(limit)
+    await get_supabase().table("broadcast_deliveries").upsert(
+        [{**row, "updated_at": now_iso} for row in rows],
+        on_conflict="broadcast_key,chat_id",
+    ).execute()
+
+
+async def prune_deliveries(max_age: timedelta):
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    await get_supabase().table("broadcast_deliveries").delete().lt("updated_at", cutoff).execute()
+
+
+# --- Job state ---
+
+async def get_job_high_water_mark(job_id: str) -> Optional[datetime]:
+    result = await (
+        get_supabase().table("job_state")
+        .select("high_water_mark")
+        .eq("job_id", job_id)
+        .maybe_single()
         .execute()
     )
-    return result.data
+    return datetime.fromisoformat(result.data["high_water_mark"]) if result else None
+
+
+async def set_job_high_water_mark(job_id: str, mark: datetime):
+    await get_supabase().table("job_state").upsert({
+        "job_id": job_id,
+        "high_water_mark": mark.isoformat(),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }, on_conflict="job_id").execute()
+
+
+# --- Reminders ---
+
+async def create_reminders(account_id: str, event_id: str, remind_ats: list[datetime]) -> list[dict]:
+    """Insert reminders in one statement, skipping ones that already exist. Returns only new rows."""
+    if not remind_ats:
+        return []
+    result = await (
+        get_supabase().table("reminders")
+        .upsert(
+            [
+                {"fk_account_id": account_id, "fk_event_id": event_id, "remind_at": at.isoformat()}
+                for at in remind_ats
+            ],
+            on_conflict="fk_account_id,fk_event_id,remind_at",
+            ignore_duplicates=True,
+        )
+        .execute()
+    )
+    return result.data or []
+
+
+async def claim_due_reminders(limit: int, claimer: str, stale_after: timedelta) -> list[dict]:
+    """Claim up to limit due reminders for this runner. Rows: {reminder_id, tele_id, event}."""
+    result = await get_supabase().rpc("claim_due_reminders", {
+        "p_limit": limit,
+        "p_claimer": claimer,
+        "p_stale_seconds": int(stale_after.total_seconds()),
+    }).execute()
+    return result.data or []
+
+
+async def claim_reminders_by_id(reminder_ids: list[str], claimer: str, stale_after: timedelta) -> list[dict]:
+    """Claim the given reminders if still unsent and unclaimed. Same row shape as claim_due_reminders."""
+    result = await get_supabase().rpc("claim_reminders_by_id", {
+        "p_reminder_ids": reminder_ids,
+        "p_claimer": claimer,
+        "p_stale_seconds": int(stale_after.total_seconds()),
+    }).execute()
+    return result.data or []
+
+
+async def get_pending_reminders(until: datetime) -> list[dict]:
+    """Unsent reminders due at or before until, as {reminder_id, remind_at}."""
+    return [row async for row in _paged(lambda: (
+        get_supabase().table("reminders")
+        .select("reminder_id, remind_at")
+        .eq("is_sent", False)
+        .lte("remind_at", until.isoformat())
+        .order("reminder_id")
+    ))]
+
+
+async def mark_reminders_sent(reminder_ids: list[str]):
+    if reminder_ids:
+        await get_supabase().table("reminders").update({"is_sent": True}).in_("reminder_id", reminder_ids).execute()
+
+
+async def release_reminder_claims(reminder_ids: list[str]):
+    """Hand claimed reminders back so the next run retries them."""
+    if reminder_ids:
+        await (
+            get_supabase().table("reminders")
+            .update({"claimed_at": None, "claimed_by": None})
+            .in_("reminder_id", reminder_ids)
+            .execute()
+        )
+
+
+# --- Rate limits ---
 
+async def sync_rate_limits(states: list[dict]) -> list[dict]:
+    """Merge {key, tat} limiter states into the DB; returns every still-active state."""
+    result = await get_supabase().rpc("sync_rate_limits", {"p_states": states}).execute()
+    return result.data or []
 
-def get_trending_events(limit: int = 5) -> List[dict]:
-    """Get events sorted by most RSVPs (going + interested)."""
-    result = (
-        supabase.table("rsvps")
-        .select("fk_event_id, events(*)")
+
+# --- Coordination ---
+
+async def acquire_lease(name: str, holder: str, ttl_seconds: int) -> bool:
+    """Take or renew a named lease; True if holder now holds it."""
+    result = await get_supabase().rpc("acquire_lease", {
+        "p_name": name,
+        "p_holder": holder,
+        "p_ttl_seconds": ttl_seconds,
+    }).execute()
+    return bool(result.data)
+
+
+async def release_lease(name: str, holder: str):
+    await get_supabase().rpc("release_lease", {"p_name": name, "p_holder": holder}).execute()
+
+
+async def claim_job_run(
+    job_id: str, run_key: str, holder: str, stale_after: Optional[timedelta] = None
+) -> bool:
+    """Claim one run of a job; True only for the first replica to ask, or for one taking
+    over an unfinished run claimed longer than stale_after ago."""
+    result = await get_supabase().rpc("claim_job_run", {
+        "p_job_id": job_id,
+        "p_run_key": run_key,
+        "p_holder": holder,
+        "p_stale_seconds": int(stale_after.total_seconds()) if stale_after else None,
+    }).execute()
+    return bool(result.data)
+
+
+async def finish_job_run(job_id: str, run_key: str):
+    await (
+        get_supabase().table("job_runs")
+        .update({"finished_at": datetime.now(timezone.utc).isoformat()})
+        .eq("job_id", job_id)
+        .eq("run_key", run_key)
         .execute()
     )
+
+
+async def get_stale_job_runs(job_id: str, stale_after: timedelta, max_age: timedelta) -> List[str]:
+    """Run keys of job_id claimed between max_age and stale_after ago and never finished."""
     now = datetime.now(timezone.utc)
-    event_counts = {}
-    event_data = {}
-    for row in result.data:
-        eid = row["fk_event_id"]
-        event = row.get("events")
-        if not event:
-            continue
-        # Skip deleted events
-        if event.get("is_deleted"):
-            continue
-        # Skip past events
-        if event.get("date"):
-            try:
-                event_dt = datetime.fromisoformat(event["date"])
-                if event_dt < now:
-                    continue
-            except (ValueError, TypeError):
-                pass
-        event_counts[eid] = event_counts.get(eid, 0) + 1
-        if eid not in event_data:
-            event_data[eid] = event
-
-    sorted_ids = sorted(event_counts, key=event_counts.get, reverse=True)[:limit]
-    return [event_data[eid] for eid in sorted_ids if eid in event_data]
+    result = await (
+        get_supabase().table("job_runs")
+        .select("run_key")
+        .eq("job_id", job_id)
+        .is_("finished_at", "null")
+        .lt("claimed_at", (now - stale_after).isoformat())
+        .gte("claimed_at", (now - max_age).isoformat())
+        .execute()
+    )
+    return [row["run_key"] for row in result.data]
+
+
+async def prune_job_runs(max_age: timedelta):
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    await get_supabase().table("job_runs").delete().lt("claimed_at", cutoff).execute()
 
 
 # --- Search ---
 
-def search_events(query: Optional[str] = None, category: Optional[str] = None, limit: int = 10) -> List[dict]:
-    result = supabase.rpc("search_events", {
+async def search_events(
+    query: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10,
+    after: Optional[tuple[float, str]] = None,
+) -> List[dict]:
+    """Ranked search, as rows of {event, rank}. Pass the last row's (rank, event_id) as after for the next page."""
+    result = await get_supabase().rpc("search_events", {
         "p_query": query,
         "p_category": category,
         "p_limit": limit,
+        "p_after_rank": after[0] if after else None,
+        "p_after_id": after[1] if after else None,
     }).execute()
-    return result.data
+    return result.data or []
+
+
+async def create_find_session(session: dict):
+    await get_supabase().table("find_sessions").insert(session).execute()
+
+
+async def get_find_session(token: str) -> Optional[dict]:
+    result = await get_supabase().table("find_sessions").select("*").eq("token", token).maybe_single().execute()
+    return result.data if result else None
+
+
+async def advance_find_session(session: dict, from_page: int) -> bool:
+    """Save the session's new cursor if it is still on from_page; False if another tap got there first."""
+    result = await (
+        get_supabase().table("find_sessions")
+        .update({k: session[k] for k in ("source", "local_offset", "after_rank", "after_id", "page")})
+        .eq("token", session["token"])
+        .eq("page", from_page)
+        .execute()
+    )
+    return bool(result.data)
+
+
+async def prune_find_sessions(max_age: timedelta):
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    await get_supabase().table("find_sessions").delete().lt("created_at", cutoff).execute()
+
+
+async def get_upcoming_events_for_index(since: datetime) -> List[dict]:
+    """Every non-deleted event dated at or after since, as rows of {event, categories}."""
+    return [row async for row in _paged(
+        lambda: get_supabase().rpc("upcoming_events_for_index", {"p_from": since.isoformat()})
+    )]
 
 
 # --- Event editing ---
 
-def update_event(event_id: str, **fields) -> dict:
+async def update_event(event_id: str, **fields) -> dict:
     """Update specific fields on an event."""
-    result = supabase.table("events").update(fields).eq("event_id", event_id).execute()
+    result = await (
+        get_supabase().table("events")
+        .update(fields)
+        .eq("event_id", event_id)
+        .select(EVENT_COLUMNS)
+        .execute()
+    )
     return result.data[0]
 
 
-def get_events_by_account(account_id: str, limit: int = 10) -> List[dict]:
+async def update_event_date(event_id: str, date: str) -> Optional[dict]:
+    """Change an event's date and shift its pending reminders in one transaction.
+
+    Returns {event, cancelled: [reminder_id], scheduled: [{reminder_id, remind_at}]},
+    or None if no such event exists.
+    """
+    result = await get_supabase().rpc("update_event_date", {"p_event_id": event_id, "p_date": date}).execute()
+    return result.data
+
+
+async def soft_delete_event(event_id: str) -> Optional[List[str]]:
+    """Mark an event as deleted and cancel its pending reminders.
+
+    Returns the cancelled reminder ids, or None if no such event exists.
+    """
+    result = await get_supabase().rpc("soft_delete_event", {"p_event_id": event_id}).execute()
+    return result.data
+
+
+async def get_events_by_account(account_id: str, limit: int = 10) -> List[dict]:
     """Get all events (including deleted) posted by this account, newest first."""
-    result = (
-        supabase.table("events")
-        .select("*")
+    result = await (
+        get_supabase().table("events")
+        .select(EVENT_COLUMNS)
         .eq("fk_account_id", account_id)
         .order("created_at", desc=True)
         .limit(limit)
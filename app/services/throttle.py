@@ -0,0 +1,63 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+# Telegram Bot API limits: about 30 messages per second across all chats, about one
+# message per second in a private chat, and 20 messages per minute in a group
+# (short bursts are tolerated)
+GLOBAL_RATE = 30.0
+GLOBAL_BURST = 30
+PRIVATE_CHAT_RATE = 1.0
+PRIVATE_CHAT_BURST = 3
+GROUP_CHAT_RATE = 20 / 60
+GROUP_CHAT_BURST = 5
+
+_MAX_TRACKED_CHATS = 10_000
+
+
+class TokenBucket:
+    """Async token bucket. acquire() waits until a token is free; waiters are served FIFO."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+_global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+_chat_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+
+
+async def acquire_send(chat_id: int):
+    """Wait for both the bot-wide and the per-chat send budget."""
+    await _global_bucket.acquire()
+    await chat_bucket(chat_id).acquire()
+
+
+def chat_bucket(chat_id: int) -> TokenBucket:
+    """Shared per-chat send limiter; group chats (negative ids) get the stricter group limit."""
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        if chat_id < 0:
+            bucket = TokenBucket(GROUP_CHAT_RATE, GROUP_CHAT_BURST)
+        else:
+            bucket = TokenBucket(PRIVATE_CHAT_RATE, PRIVATE_CHAT_BURST)
+        _chat_buckets[chat_id] = bucket
+        while len(_chat_buckets) > _MAX_TRACKED_CHATS:
+            _chat_buckets.popitem(last=False)
+    else:
+        _chat_buckets.move_to_end(chat_id)
+    return bucket
@@ -0,0 +1,49 @@
+import logging
+from datetime import datetime, timezone
+
+from app.services.coordination import is_leader
+from app.services.supabase_client import get_trending_events, refresh_trending_leaderboard
+
+logger = logging.getLogger(__name__)
+
+# How many leaderboard rows are held in memory; /trending shows the top 5
+CACHE_SIZE = 20
+
+_cached: list[dict] = []
+_loaded_at: datetime | None = None
+
+
+async def refresh_trending():
+    """Recompute the leaderboard view (leader only) and reload the in-process copy. Runs on a schedule."""
+    if is_leader():
+        await refresh_trending_leaderboard()
+    await _load()
+
+
+async def _load():
+    global _cached, _loaded_at
+    _cached = await get_trending_events(limit=CACHE_SIZE)
+    _loaded_at = datetime.now(timezone.utc)
+    logger.info("Trending cache loaded with %d events", len(_cached))
+
+
+async def trending(limit: int = 5) -> list[dict]:
+    """Top trending events from memory, skipping any that have started since the last load."""
+    if _loaded_at is None:
+        await _load()
+    now = datetime.now(timezone.utc)
+    upcoming = []
+    for event in _cached:
+        try:
+            if event.get("date") and datetime.fromisoformat(event["date"]) < now:
+                continue
+        except (ValueError, TypeError):
+            pass
+        upcoming.append(event)
+    return upcoming[:limit]
+
+
+def discard(event_id: str):
+    """Drop an event (e.g. just deleted) from the cached leaderboard."""
+    global _cached
+    _cached = [e for e in _cached if e["event_id"] != event_id]
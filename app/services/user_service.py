@@ -1,35 +1,64 @@
 from typing import List, Optional
 
-from app.services.supabase_client import supabase
+from app.services import categories
+from app.services.cache import MISSING, TTLCache
+from app.services.supabase_client import get_supabase
 
 # Message shown when unverified user tries to use a feature
 VERIFY_MSG = "🔒 You need to verify your NUS identity first.\nDM me with /verify to get started."
 
 
-def get_verified_account(tele_id: int) -> Optional[dict]:
+# Accounts by tele_id, looked up at the start of nearly every update. Unknown users are
+# cached briefly too, so a freshly verified user isn't locked out for long.
+ACCOUNT_CACHE_SIZE = 10_000
+ACCOUNT_CACHE_TTL = 300.0
+NEGATIVE_CACHE_TTL = 30.0
+
+_accounts = TTLCache(maxsize=ACCOUNT_CACHE_SIZE, ttl=ACCOUNT_CACHE_TTL)
+
+
+def account_cache_stats() -> dict:
+    return _accounts.stats()
+
+
+def invalidate_account(tele_id: int, account_id: Optional[str] = None):
+    """Forget cached lookups for a Telegram user (and any other tele_id linked to account_id)."""
+    _accounts.pop(int(tele_id))
+    if account_id:
+        _accounts.discard_if(lambda account: account is not None and account["account_id"] == account_id)
+
+
+def _remember(rows: List[dict]):
+    """Refresh cached accounts from rows returned by a write."""
+    for row in rows:
+        if row.get("tele_id"):
+            _accounts.set(row["tele_id"], row)
+
+
+async def get_verified_account(tele_id: int) -> Optional[dict]:
     """Return account for this tele_id, or None if not found.
 
     Having an account record means the user has completed NUS email verification
     (account_id is FK'd to auth.users, so it can only exist post-verification).
     """
-    result = (
-        supabase.table("accounts")
+    cached = _accounts.get(tele_id)
+    if cached is not MISSING:
+        return cached
+    result = await (
+        get_supabase().table("accounts")
         .select("*")
         .eq("tele_id", tele_id)
         .maybe_single()
         .execute()
     )
-    return result.data
+    account = result.data if result else None
+    _accounts.set(tele_id, account, ttl=None if account else NEGATIVE_CACHE_TTL)
+    return account
 
 
-def get_all_categories() -> List[dict]:
-    result = supabase.table("categories").select("*").order("name").execute()
-    return result.data
-
-
-def get_account_subscriptions(account_id: str) -> List[dict]:
-    result = (
-        supabase.table("account_categories")
+async def get_account_subscriptions(account_id: str) -> List[dict]:
+    result = await (
+        get_supabase().table("account_categories")
         .select("fk_category_id")
         .eq("fk_account_id", account_id)
         .execute()
@@ -37,46 +66,36 @@ def get_account_subscriptions(account_id: str) -> List[dict]:
     return result.data
 
 
-def get_category_subscriber_counts() -> dict:
-    """Return {category_id: subscriber_count} for all categories."""
-    result = supabase.table("account_categories").select("fk_category_id").execute()
-    counts: dict[str, int] = {}
-    for row in result.data:
-        cid = row["fk_category_id"]
-        counts[cid] = counts.get(cid, 0) + 1
-    return counts
+async def toggle_subscription(account_id: str, category_id: str) -> dict:
+    """Toggle subscription in one atomic call.
 
+    Returns {subscribed, subscriptions: set of category ids, subscriber_count}.
+    """
+    result = await get_supabase().rpc("toggle_subscription", {
+        "p_account_id": account_id,
+        "p_category_id": category_id,
+    }).execute()
+    change = result.data
+    categories.set_subscribers(category_id, change["subscriber_count"])
+    return {**change, "subscriptions": set(change["subscriptions"])}
 
-def toggle_subscription(account_id: str, category_id: str) -> bool:
-    """Toggle subscription. Returns True if subscribed, False if unsubscribed."""
-    existing = (
-        supabase.table("account_categories")
-        .select("ac_id")
-        .eq("fk_account_id", account_id)
-        .eq("fk_category_id", category_id)
-        .maybe_single()
-        .execute()
-    )
-    if existing.data:
-        (
-            supabase.table("account_categories")
-            .delete()
-            .eq("ac_id", existing.data["ac_id"])
-            .execute()
-        )
-        return False
-    (
-        supabase.table("account_categories")
-        .insert({"fk_account_id": account_id, "fk_category_id": category_id})
+
+async def update_reminder_offsets(account_id: str, offsets: Optional[List[int]]):
+    """Set reminder offsets in minutes; None restores the default."""
+    result = await (
+        get_supabase().table("accounts")
+        .update({"reminder_offsets": offsets})
+        .eq("account_id", account_id)
         .execute()
     )
-    return True
+    _remember(result.data)
 
 
-def update_newsletter_time(account_id: str, time_str: str):
-    (
-        supabase.table("accounts")
+async def update_newsletter_time(account_id: str, time_str: str):
+    result = await (
+        get_supabase().table("accounts")
         .update({"newsletter_time": time_str})
         .eq("account_id", account_id)
         .execute()
     )
+    _remember(result.data)
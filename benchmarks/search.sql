@@ -0,0 +1,59 @@
+-- search_events latency checks
+-- Run in the Supabase SQL editor (or psql) after migration.sql. Everything happens
+-- inside a transaction that is rolled back, so no synthetic rows are left behind.
+-- Expect bitmap scans on events_search_vector_idx / events_search_trgm_idx for
+-- keyword queries and on event_categories_category_idx for category queries; a
+-- sequential scan on events means an index is missing or unused.
+
+BEGIN;
+
+-- Optional: pad the table to a realistic size (50k events over two years)
+INSERT INTO events (text, title, location, description, date, fk_account_id, text_hash)
+SELECT
+  'Event ' || g || ' #unipulse ' || (ARRAY['hackathon', 'concert', 'career fair', 'workshop', 'sports day'])[1 + g % 5],
+  (ARRAY['Hackathon Night', 'Jazz Concert', 'Career Fair', 'Python Workshop', 'Sports Day'])[1 + g % 5] || ' ' || g,
+  (ARRAY['UTown Auditorium', 'COM1', 'MPSH', 'Yusof Ishak House', 'Engineering Auditorium'])[1 + g % 5],
+  'Synthetic benchmark event number ' || g,
+  now() - interval '365 days' + (g % 730) * interval '1 day',
+  (SELECT account_id FROM accounts LIMIT 1),
+  md5('bench' || g)
+FROM generate_series(1, 50000) AS g;
+
+ANALYZE events;
+
+-- Keyword search, first page
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM search_events(p_query => 'hackathon', p_limit => 6);
+
+-- Multi-word query
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM search_events(p_query => 'python workshop com1', p_limit => 6);
+
+-- Typo: no full-text match, answered by the trigram index
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM search_events(p_query => 'hackaton', p_limit => 6);
+
+-- Deep page via keyset: cost should not grow with page depth
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM search_events(
+  p_query => 'concert',
+  p_limit => 6,
+  p_after_rank => (SELECT rank FROM search_events(p_query => 'concert', p_limit => 500) OFFSET 499 LIMIT 1),
+  p_after_id => (SELECT (event->>'event_id')::uuid FROM search_events(p_query => 'concert', p_limit => 500) OFFSET 499 LIMIT 1)
+);
+
+-- Category search
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM search_events(p_category => 'sports', p_limit => 6);
+
+-- The planner's view of the inner query (a SQL function body is opaque to EXPLAIN above)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT e.event_id
+FROM events e
+WHERE NOT e.is_deleted
+  AND (
+    e.search_vector @@ websearch_to_tsquery('english', 'hackathon')
+    OR 'hackathon' <% (coalesce(e.title, '') || ' ' || coalesce(e.text, ''))
+  );
+
+ROLLBACK;
@@ -30,3 +30,702 @@ BEGIN
   RETURN new_count;
 END;
 $$ LANGUAGE plpgsql;
+
+
+-- Gemini extraction cache: parsed results keyed by normalised text hash / image digest,
+-- so cross-posted announcements skip the LLM call
+CREATE TABLE IF NOT EXISTS extraction_cache (
+  cache_key text PRIMARY KEY,
+  result jsonb NOT NULL,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS extraction_cache_created_at_idx ON extraction_cache (created_at);
+
+
+-- Category names are unique; ingest_event relies on this for its upsert
+CREATE UNIQUE INDEX IF NOT EXISTS categories_name_key ON categories (name);
+
+CREATE INDEX IF NOT EXISTS events_text_hash_idx ON events (text_hash);
+CREATE INDEX IF NOT EXISTS events_account_created_at_idx ON events (fk_account_id, created_at);
+
+
+-- RPC function: ingest one parsed #unipulse post in a single transaction.
+-- Checks for a duplicate created since p_since (NULL: any time), enforces the hourly posting limit, inserts the event,
+-- resolves its category from the post's hashtags (first known tag, else first tag,
+-- else 'general'), and links the two.
+-- Returns {"status": "created" | "duplicate" | "rate_limited", "event": ..., "category": ...}
+DROP FUNCTION IF EXISTS ingest_event(uuid, text, text, text[], timestamptz, timestamptz, text, text, text, int);
+CREATE OR REPLACE FUNCTION ingest_event(
+  p_account_id uuid,
+  p_text text,
+  p_text_hash text,
+  p_tags text[] DEFAULT '{}',
+  p_date timestamptz DEFAULT NULL,
+  p_end_date timestamptz DEFAULT NULL,
+  p_title text DEFAULT NULL,
+  p_location text DEFAULT NULL,
+  p_description text DEFAULT NULL,
+  p_max_posts_per_hour int DEFAULT 5,
+  p_since timestamptz DEFAULT NULL
+)
+RETURNS jsonb AS $$
+DECLARE
+  recent_count int;
+  category_name text;
+  new_event events%ROWTYPE;
+  cat categories%ROWTYPE;
+  new_ec_id uuid;
+BEGIN
+  -- Serialise concurrent posts by the same account and of the same text
+  PERFORM pg_advisory_xact_lock(hashtext('ingest:account:' || p_account_id::text));
+  PERFORM pg_advisory_xact_lock(hashtext('ingest:hash:' || p_text_hash));
+
+  IF EXISTS (
+    SELECT 1 FROM events
+    WHERE text_hash = p_text_hash AND NOT is_deleted
+      AND (p_since IS NULL OR created_at >= p_since)
+  ) THEN
+    RETURN jsonb_build_object('status', 'duplicate');
+  END IF;
+
+  SELECT count(*)::int INTO recent_count
+  FROM events
+  WHERE fk_account_id = p_account_id AND created_at >= now() - interval '1 hour';
+
+  IF recent_count >= p_max_posts_per_hour THEN
+    RETURN jsonb_build_object('status', 'rate_limited');
+  END IF;
+
+  INSERT INTO events (text, fk_account_id, text_hash, date, end_date, title, location, description)
+  VALUES (p_text, p_account_id, p_text_hash, p_date, p_end_date, p_title, p_location, p_description)
+  RETURNING * INTO new_event;
+
+  SELECT c.name INTO category_name
+  FROM unnest(p_tags) WITH ORDINALITY AS t(tag, pos)
+  JOIN categories c ON c.name = t.tag
+  ORDER BY t.pos
+  LIMIT 1;
+
+  category_name := coalesce(category_name, p_tags[1], 'general');
+
+  INSERT INTO categories (name) VALUES (category_name)
+  ON CONFLICT (name) DO NOTHING;
+  SELECT * INTO cat FROM categories WHERE name = category_name;
+
+  INSERT INTO event_categories (fk_event_id, fk_category_id)
+  VALUES (new_event.event_id, cat.category_id)
+  RETURNING ec_id INTO new_ec_id;
+
+  UPDATE events SET fk_ec_id = new_ec_id
+  WHERE event_id = new_event.event_id
+  RETURNING * INTO new_event;
+
+  RETURN jsonb_build_object(
+    'status', 'created',
+    'event', to_jsonb(new_event) - 'search_vector',
+    'category', to_jsonb(cat)
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- One image row per event and URL, so a retried poster upload upserts instead of
+-- adding a second row (drop any duplicates left by earlier retries)
+DELETE FROM event_images a
+USING event_images b
+WHERE a.ctid > b.ctid
+  AND a.fk_event_id = b.fk_event_id
+  AND a.url = b.url;
+
+CREATE UNIQUE INDEX IF NOT EXISTS event_images_event_url_key ON event_images (fk_event_id, url);
+
+
+CREATE INDEX IF NOT EXISTS rsvps_event_idx ON rsvps (fk_event_id);
+
+
+-- RPC function: RSVP counts for a batch of events in one grouped query.
+-- Events without RSVPs are omitted (count 0).
+CREATE OR REPLACE FUNCTION rsvp_counts(
+  p_event_ids uuid[]
+)
+RETURNS TABLE (event_id uuid, rsvp_count int) AS $$
+  SELECT fk_event_id, count(*)::int
+  FROM rsvps
+  WHERE fk_event_id = ANY (p_event_ids)
+  GROUP BY fk_event_id;
+$$ LANGUAGE sql STABLE;
+
+
+-- Trending leaderboard: upcoming, non-deleted events scored by RSVPs, each RSVP
+-- decaying with a 3-day half-life so fresh interest outranks old totals.
+-- Refreshed every few minutes by the app via refresh_trending_leaderboard().
+ALTER TABLE rsvps ADD COLUMN IF NOT EXISTS created_at timestamptz DEFAULT now();
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS trending_leaderboard AS
+SELECT
+  e.event_id,
+  count(r.rsvp_id)::int AS rsvp_count,
+  sum(power(0.5, extract(epoch FROM now() - coalesce(r.created_at, now())) / 259200.0))::float8 AS score
+FROM events e
+JOIN rsvps r ON r.fk_event_id = e.event_id
+WHERE NOT e.is_deleted AND e.date >= now()
+GROUP BY e.event_id;
+
+-- Unique index is required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS trending_leaderboard_event_idx ON trending_leaderboard (event_id);
+CREATE INDEX IF NOT EXISTS trending_leaderboard_score_idx ON trending_leaderboard (score DESC);
+
+-- SECURITY DEFINER (the view's owner refreshes it), so search_path is pinned to keep
+-- callers from shadowing objects with their own schema
+CREATE OR REPLACE FUNCTION refresh_trending_leaderboard()
+RETURNS void AS $$
+BEGIN
+  REFRESH MATERIALIZED VIEW CONCURRENTLY public.trending_leaderboard;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- RPC function: top trending events, read in score order off the leaderboard index.
+-- Re-checks deletion and date so events deleted or started since the last refresh drop out.
+CREATE OR REPLACE FUNCTION get_trending_events(
+  p_limit int DEFAULT 5
+)
+RETURNS TABLE (event jsonb, rsvp_count int, score float8) AS $$
+  SELECT to_jsonb(e) - 'search_vector', t.rsvp_count, t.score
+  FROM trending_leaderboard t
+  JOIN events e ON e.event_id = t.event_id
+  WHERE NOT e.is_deleted AND e.date >= now()
+  ORDER BY t.score DESC
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+
+CREATE INDEX IF NOT EXISTS events_upcoming_date_idx ON events (date) WHERE NOT is_deleted;
+CREATE INDEX IF NOT EXISTS account_categories_account_idx ON account_categories (fk_account_id);
+
+
+-- RPC function: most-RSVP'd non-deleted events dated within [p_from, p_to).
+-- Only events in the window are counted, via the date and rsvps(fk_event_id) indexes,
+-- so cost tracks the window rather than all-time RSVP history.
+CREATE OR REPLACE FUNCTION top_events_between(
+  p_from timestamptz,
+  p_to timestamptz,
+  p_limit int DEFAULT 10
+)
+RETURNS TABLE (event jsonb, rsvp_count int) AS $$
+  SELECT to_jsonb(e) - 'search_vector', c.rsvp_count
+  FROM events e
+  CROSS JOIN LATERAL (
+    SELECT count(*)::int AS rsvp_count FROM rsvps r WHERE r.fk_event_id = e.event_id
+  ) c
+  WHERE NOT e.is_deleted
+    AND e.date >= p_from AND e.date < p_to
+    AND c.rsvp_count > 0
+  ORDER BY c.rsvp_count DESC, e.date
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+
+-- RPC function: distinct Telegram ids of accounts with at least one category subscription.
+-- Ordered so callers can page with range().
+CREATE OR REPLACE FUNCTION subscriber_tele_ids()
+RETURNS TABLE (tele_id bigint) AS $$
+  SELECT DISTINCT a.tele_id
+  FROM accounts a
+  WHERE a.tele_id IS NOT NULL
+    AND EXISTS (SELECT 1 FROM account_categories ac WHERE ac.fk_account_id = a.account_id)
+  ORDER BY a.tele_id;
+$$ LANGUAGE sql STABLE;
+
+
+-- Per-recipient delivery state for newsletter/digest broadcasts, so an interrupted
+-- run can be resumed without re-sending. status: 'sent' | 'failed' (permanent) | 'retry'
+CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+  broadcast_key text NOT NULL,
+  chat_id bigint NOT NULL,
+  status text NOT NULL,
+  attempts int NOT NULL DEFAULT 0,
+  last_error text,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (broadcast_key, chat_id)
+);
+
+
+CREATE INDEX IF NOT EXISTS event_categories_category_idx ON event_categories (fk_category_id, fk_event_id);
+
+
+-- RPC function: for each category, its next p_limit non-deleted events dated in
+-- [p_from, p_to], soonest first. Any account's top-N digest across its categories
+-- is contained in this result, so the digest transfers at most N rows per category.
+-- Uses events_upcoming_date_idx (events(date) WHERE NOT is_deleted).
+CREATE OR REPLACE FUNCTION upcoming_events_for_categories(
+  p_category_ids uuid[],
+  p_from timestamptz,
+  p_to timestamptz,
+  p_limit int DEFAULT 10
+)
+RETURNS TABLE (category_id uuid, event jsonb) AS $$
+  SELECT c.category_id, jsonb_build_object(
+    'event_id', ev.event_id,
+    'title', ev.title,
+    'text', ev.text,
+    'date', ev.date
+  )
+  FROM unnest(p_category_ids) AS c(category_id)
+  CROSS JOIN LATERAL (
+    SELECT e.event_id, e.title, e.text, e.date
+    FROM event_categories ec
+    JOIN events e ON e.event_id = ec.fk_event_id
+    WHERE ec.fk_category_id = c.category_id
+      AND NOT e.is_deleted
+      AND e.date >= p_from AND e.date <= p_to
+    ORDER BY e.date
+    LIMIT p_limit
+  ) ev;
+$$ LANGUAGE sql STABLE;
+
+
+-- Scheduler high-water marks: the last slot each catch-up job fully processed,
+-- so minutes missed during a slow run or a restart are replayed
+CREATE TABLE IF NOT EXISTS job_state (
+  job_id text PRIMARY KEY,
+  high_water_mark timestamptz NOT NULL,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS accounts_newsletter_time_idx ON accounts (newsletter_time);
+
+
+-- Scheduler coordination across web replicas.
+-- scheduler_leases: one row per lease; whoever holds an unexpired lease is the leader.
+-- job_runs: one row per (job, run key), so a given run is executed by exactly one replica.
+-- finished_at stays NULL until the run completes, so a run whose replica died mid-way
+-- can be found and taken over.
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+  name text PRIMARY KEY,
+  holder text NOT NULL,
+  expires_at timestamptz NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_runs (
+  job_id text NOT NULL,
+  run_key text NOT NULL,
+  claimed_by text NOT NULL,
+  claimed_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (job_id, run_key)
+);
+
+ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS finished_at timestamptz;
+
+
+-- RPC function: take or renew a lease. Succeeds if the lease is free, expired,
+-- or already held by p_holder; returns whether p_holder now holds it.
+CREATE OR REPLACE FUNCTION acquire_lease(
+  p_name text,
+  p_holder text,
+  p_ttl_seconds int
+)
+RETURNS boolean AS $$
+BEGIN
+  INSERT INTO scheduler_leases (name, holder, expires_at)
+  VALUES (p_name, p_holder, now() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (name) DO UPDATE
+    SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+    WHERE scheduler_leases.holder = p_holder OR scheduler_leases.expires_at < now();
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION release_lease(
+  p_name text,
+  p_holder text
+)
+RETURNS void AS $$
+  DELETE FROM scheduler_leases WHERE name = p_name AND holder = p_holder;
+$$ LANGUAGE sql;
+
+
+-- RPC function: claim one run of a job. Returns true for the first caller only, or,
+-- when p_stale_seconds is given, for a caller taking over an unfinished run whose
+-- claim is older than that (its replica crashed or restarted mid-run).
+DROP FUNCTION IF EXISTS claim_job_run(text, text, text);
+
+CREATE OR REPLACE FUNCTION claim_job_run(
+  p_job_id text,
+  p_run_key text,
+  p_holder text,
+  p_stale_seconds int DEFAULT NULL
+)
+RETURNS boolean AS $$
+BEGIN
+  INSERT INTO job_runs (job_id, run_key, claimed_by)
+  VALUES (p_job_id, p_run_key, p_holder)
+  ON CONFLICT (job_id, run_key) DO UPDATE
+    SET claimed_by = EXCLUDED.claimed_by, claimed_at = now()
+    WHERE job_runs.finished_at IS NULL
+      AND p_stale_seconds IS NOT NULL
+      AND job_runs.claimed_at < now() - make_interval(secs => p_stale_seconds);
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Reminder dispatch: reminders are claimed in batches before sending, so concurrent
+-- runners never pick the same row and a crashed runner's claims expire and are retried
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS claimed_at timestamptz;
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS claimed_by text;
+
+CREATE INDEX IF NOT EXISTS reminders_due_idx ON reminders (remind_at) WHERE NOT is_sent;
+
+
+-- RPC function: atomically claim up to p_limit due, unsent reminders (skipping rows
+-- another runner holds) and return them with the recipient and event to send
+CREATE OR REPLACE FUNCTION claim_due_reminders(
+  p_limit int,
+  p_claimer text,
+  p_stale_seconds int DEFAULT 600
+)
+RETURNS TABLE (reminder_id uuid, tele_id bigint, event jsonb) AS $$
+  WITH claimed AS (
+    UPDATE reminders r
+    SET claimed_at = now(), claimed_by = p_claimer
+    WHERE r.reminder_id IN (
+      SELECT d.reminder_id
+      FROM reminders d
+      WHERE NOT d.is_sent
+        AND d.remind_at <= now()
+        AND (d.claimed_at IS NULL OR d.claimed_at < now() - make_interval(secs => p_stale_seconds))
+      ORDER BY d.remind_at
+      LIMIT p_limit
+      FOR UPDATE SKIP LOCKED
+    )
+    RETURNING r.reminder_id, r.fk_account_id, r.fk_event_id
+  )
+  SELECT c.reminder_id, a.tele_id,
+    CASE WHEN e.event_id IS NULL THEN NULL
+    ELSE jsonb_build_object('event_id', e.event_id, 'text', e.text, 'date', e.date) END
+  FROM claimed c
+  LEFT JOIN accounts a ON a.account_id = c.fk_account_id
+  LEFT JOIN events e ON e.event_id = c.fk_event_id;
+$$ LANGUAGE sql;
+
+
+-- RPC function: claim specific reminders (fired by an in-process timer) for sending.
+-- Same claim rules as claim_due_reminders, so the timer and the sweep never both send one,
+-- and only reminders already due, so a stale or early timer entry can't send ahead of time.
+CREATE OR REPLACE FUNCTION claim_reminders_by_id(
+  p_reminder_ids uuid[],
+  p_claimer text,
+  p_stale_seconds int DEFAULT 600
+)
+RETURNS TABLE (reminder_id uuid, tele_id bigint, event jsonb) AS $$
+  WITH claimed AS (
+    UPDATE reminders r
+    SET claimed_at = now(), claimed_by = p_claimer
+    WHERE r.reminder_id IN (
+      SELECT d.reminder_id
+      FROM reminders d
+      WHERE d.reminder_id = ANY(p_reminder_ids)
+        AND d.remind_at <= now()
+        AND NOT d.is_sent
+        AND (d.claimed_at IS NULL OR d.claimed_at < now() - make_interval(secs => p_stale_seconds))
+      FOR UPDATE SKIP LOCKED
+    )
+    RETURNING r.reminder_id, r.fk_account_id, r.fk_event_id
+  )
+  SELECT c.reminder_id, a.tele_id,
+    CASE WHEN e.event_id IS NULL THEN NULL
+    ELSE jsonb_build_object('event_id', e.event_id, 'text', e.text, 'date', e.date) END
+  FROM claimed c
+  LEFT JOIN accounts a ON a.account_id = c.fk_account_id
+  LEFT JOIN events e ON e.event_id = c.fk_event_id;
+$$ LANGUAGE sql;
+
+
+-- One reminder per account, event and time, so reminder creation is a single
+-- INSERT ... ON CONFLICT DO NOTHING (drop any duplicates left by the old check-then-insert)
+DELETE FROM reminders a
+USING reminders b
+WHERE a.ctid > b.ctid
+  AND a.fk_account_id = b.fk_account_id
+  AND a.fk_event_id = b.fk_event_id
+  AND a.remind_at = b.remind_at;
+
+CREATE UNIQUE INDEX IF NOT EXISTS reminders_account_event_time_key
+  ON reminders (fk_account_id, fk_event_id, remind_at);
+
+-- Per-user reminder offsets in minutes before the event; NULL means the app default
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS reminder_offsets int[];
+
+
+-- RPC function: soft-delete an event and cancel its pending reminders in one transaction.
+-- Returns NULL if the event doesn't exist, else the ids of the cancelled reminders.
+CREATE OR REPLACE FUNCTION soft_delete_event(p_event_id uuid)
+RETURNS uuid[] AS $$
+DECLARE
+  v_cancelled uuid[];
+BEGIN
+  UPDATE events SET is_deleted = true, deleted_at = now() WHERE event_id = p_event_id;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  WITH cancelled AS (
+    DELETE FROM reminders WHERE fk_event_id = p_event_id AND NOT is_sent
+    RETURNING reminder_id
+  )
+  SELECT coalesce(array_agg(reminder_id), '{}') INTO v_cancelled FROM cancelled;
+  RETURN v_cancelled;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- RPC function: change an event's date and move its pending reminders by the same
+-- amount in one transaction. Reminders that would now be in the past are dropped.
+-- Pending rows are replaced rather than updated in place, so shifted times can't
+-- collide with each other under the (account, event, remind_at) unique index.
+-- Returns {event, cancelled: [reminder_id], scheduled: [{reminder_id, remind_at}]}.
+CREATE OR REPLACE FUNCTION update_event_date(p_event_id uuid, p_date timestamptz)
+RETURNS jsonb AS $$
+DECLARE
+  v_old_date timestamptz;
+  v_event events%ROWTYPE;
+  v_cancelled uuid[];
+  v_scheduled jsonb;
+BEGIN
+  SELECT date INTO v_old_date FROM events WHERE event_id = p_event_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  UPDATE events SET date = p_date WHERE event_id = p_event_id RETURNING * INTO v_event;
+
+  CREATE TEMP TABLE _moved ON COMMIT DROP AS
+  SELECT fk_account_id, remind_at + (p_date - v_old_date) AS remind_at
+  FROM reminders
+  WHERE fk_event_id = p_event_id AND NOT is_sent AND v_old_date IS NOT NULL;
+
+  WITH cancelled AS (
+    DELETE FROM reminders WHERE fk_event_id = p_event_id AND NOT is_sent
+    RETURNING reminder_id
+  )
+  SELECT coalesce(array_agg(reminder_id), '{}') INTO v_cancelled FROM cancelled;
+
+  WITH inserted AS (
+    INSERT INTO reminders (fk_account_id, fk_event_id, remind_at)
+    SELECT fk_account_id, p_event_id, remind_at FROM _moved WHERE remind_at > now()
+    ON CONFLICT DO NOTHING
+    RETURNING reminder_id, remind_at
+  )
+  SELECT coalesce(jsonb_agg(jsonb_build_object('reminder_id', reminder_id, 'remind_at', remind_at)), '[]')
+  INTO v_scheduled FROM inserted;
+
+  DROP TABLE _moved;
+
+  RETURN jsonb_build_object(
+    'event', to_jsonb(v_event) - 'search_vector',
+    'cancelled', to_jsonb(v_cancelled),
+    'scheduled', v_scheduled
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Categories with their subscriber counts in one grouped scan; loads the
+-- in-process category catalogue at startup and on each reconciliation
+CREATE OR REPLACE VIEW category_subscriber_counts AS
+SELECT c.category_id, c.name, count(ac.fk_account_id)::int AS subscribers
+FROM categories c
+LEFT JOIN account_categories ac ON ac.fk_category_id = c.category_id
+GROUP BY c.category_id, c.name;
+
+
+-- One row per account and category; toggle_subscription relies on this
+DELETE FROM account_categories a
+USING account_categories b
+WHERE a.ctid > b.ctid
+  AND a.fk_account_id = b.fk_account_id
+  AND a.fk_category_id = b.fk_category_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS account_categories_account_category_key
+  ON account_categories (fk_account_id, fk_category_id);
+
+-- toggle_subscription re-counts the category's subscribers on every tap
+CREATE INDEX IF NOT EXISTS account_categories_category_idx ON account_categories (fk_category_id);
+
+
+-- RPC function: atomic subscription toggle. Returns the new state, the account's
+-- full subscription set and the category's new subscriber count, so the keyboard
+-- can be rebuilt without further queries.
+CREATE OR REPLACE FUNCTION toggle_subscription(
+  p_account_id uuid,
+  p_category_id uuid
+)
+RETURNS jsonb AS $$
+DECLARE
+  v_subscribed boolean;
+  v_subscriptions uuid[];
+  v_count int;
+BEGIN
+  -- Serialise double taps on the same button
+  PERFORM pg_advisory_xact_lock(hashtext('sub:' || p_account_id::text || ':' || p_category_id::text));
+
+  DELETE FROM account_categories
+  WHERE fk_account_id = p_account_id AND fk_category_id = p_category_id;
+  v_subscribed := NOT FOUND;
+
+  IF v_subscribed THEN
+    INSERT INTO account_categories (fk_account_id, fk_category_id)
+    VALUES (p_account_id, p_category_id)
+    ON CONFLICT DO NOTHING;
+  END IF;
+
+  SELECT coalesce(array_agg(fk_category_id), '{}') INTO v_subscriptions
+  FROM account_categories WHERE fk_account_id = p_account_id;
+
+  SELECT count(*)::int INTO v_count
+  FROM account_categories WHERE fk_category_id = p_category_id;
+
+  RETURN jsonb_build_object(
+    'subscribed', v_subscribed,
+    'subscriptions', to_jsonb(v_subscriptions),
+    'subscriber_count', v_count
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Rate limiter state: one GCRA "theoretical arrival time" per (tele_id, rule) key.
+-- Replicas merge their in-process state here periodically, so limits survive restarts.
+CREATE TABLE IF NOT EXISTS rate_limit_state (
+  key text PRIMARY KEY,
+  tat timestamptz NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS rate_limit_state_tat_idx ON rate_limit_state (tat);
+
+
+-- RPC function: merge local limiter state (keeping the later TAT, i.e. the stricter
+-- limit), drop keys that have fully recovered, and return every still-active key
+CREATE OR REPLACE FUNCTION sync_rate_limits(p_states jsonb)
+RETURNS TABLE (key text, tat timestamptz) AS $$
+  INSERT INTO rate_limit_state AS s (key, tat)
+  SELECT r.key, r.tat FROM jsonb_to_recordset(p_states) AS r(key text, tat timestamptz)
+  ON CONFLICT (key) DO UPDATE SET tat = GREATEST(s.tat, EXCLUDED.tat);
+
+  DELETE FROM rate_limit_state WHERE rate_limit_state.tat <= now();
+
+  SELECT s.key, s.tat FROM rate_limit_state s;
+$$ LANGUAGE sql;
+
+
+-- Event search: weighted full-text vector (title > location > description > text)
+-- plus trigram matching on title and text for typo tolerance
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(text, '')), 'D')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS events_search_vector_idx ON events USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS events_search_trgm_idx
+  ON events USING gin ((coalesce(title, '') || ' ' || coalesce(text, '')) gin_trgm_ops);
+
+
+-- RPC function: ranked, keyset-paginated event search.
+-- Keyword search (p_query) ranks by ts_rank_cd plus trigram word similarity; category
+-- search (p_category alone) lists upcoming events soonest first, then past events
+-- newest first. Pass the last row's (rank, event_id) as p_after_* for the next page.
+DROP FUNCTION IF EXISTS search_events(text, text, int);
+
+CREATE OR REPLACE FUNCTION search_events(
+  p_query text DEFAULT NULL,
+  p_category text DEFAULT NULL,
+  p_limit int DEFAULT 10,
+  p_after_rank float8 DEFAULT NULL,
+  p_after_id uuid DEFAULT NULL
+)
+RETURNS TABLE (event jsonb, rank float8) AS $$
+  WITH matches AS (
+    SELECT e.*,
+      CASE
+        WHEN p_query IS NOT NULL THEN
+          ts_rank_cd(e.search_vector, websearch_to_tsquery('english', p_query))
+          + word_similarity(p_query, coalesce(e.title, '') || ' ' || coalesce(e.text, ''))
+        WHEN e.date >= now() THEN 2e10 - extract(epoch FROM e.date)
+        ELSE extract(epoch FROM coalesce(e.date, e.created_at))
+      END::float8 AS rank
+    FROM events e
+    WHERE NOT e.is_deleted
+      AND (
+        p_query IS NULL
+        OR e.search_vector @@ websearch_to_tsquery('english', p_query)
+        OR p_query <% (coalesce(e.title, '') || ' ' || coalesce(e.text, ''))
+      )
+      AND (
+        p_category IS NULL
+        OR EXISTS (
+          SELECT 1
+          FROM event_categories ec
+          JOIN categories c ON c.category_id = ec.fk_category_id
+          WHERE ec.fk_event_id = e.event_id AND c.name = lower(p_category)
+        )
+      )
+  )
+  SELECT
+    (to_jsonb(m) - 'search_vector' - 'rank') || jsonb_build_object(
+      'event_images',
+      (SELECT coalesce(jsonb_agg(jsonb_build_object('url', ei.url)), '[]')
+       FROM event_images ei WHERE ei.fk_event_id = m.event_id)
+    ),
+    m.rank
+  FROM matches m
+  WHERE p_after_rank IS NULL OR (m.rank, m.event_id) < (p_after_rank, p_after_id)
+  ORDER BY m.rank DESC, m.event_id DESC
+  LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+
+-- /find paging state, so "Next page" works whichever replica the tap reaches and
+-- survives restarts. The button's callback_data carries the token and page number;
+-- page also acts as a compare-and-set guard against double taps.
+CREATE TABLE IF NOT EXISTS find_sessions (
+  token text PRIMARY KEY,
+  tele_id bigint NOT NULL,
+  query text,
+  category text,
+  source text NOT NULL,
+  used_local boolean NOT NULL DEFAULT false,
+  local_offset int NOT NULL DEFAULT 0,
+  after_rank float8,
+  after_id uuid,
+  page int NOT NULL DEFAULT 0,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+
+-- RPC function: upcoming, non-deleted events with their category names and images,
+-- for loading the in-process search index. Ordered so callers can page with range().
+CREATE OR REPLACE FUNCTION upcoming_events_for_index(p_from timestamptz)
+RETURNS TABLE (event jsonb, categories text[]) AS $$
+  SELECT
+    (to_jsonb(e) - 'search_vector') || jsonb_build_object(
+      'event_images',
+      (SELECT coalesce(jsonb_agg(jsonb_build_object('url', ei.url)), '[]')
+       FROM event_images ei WHERE ei.fk_event_id = e.event_id)
+    ),
+    ARRAY(
+      SELECT c.name
+      FROM event_categories ec
+      JOIN categories c ON c.category_id = ec.fk_category_id
+      WHERE ec.fk_event_id = e.event_id
+    )
+  FROM events e
+  WHERE NOT e.is_deleted AND e.date >= p_from
+  ORDER BY e.date, e.event_id;
+$$ LANGUAGE sql STABLE;
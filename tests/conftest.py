@@ -0,0 +1,13 @@
+import os
+
+# app.config builds Settings at import time; the tests never reach the network
+for _name in (
+    "TOKEN",
+    "WEBHOOK_URL",
+    "WEBHOOK_SECRET",
+    "SUPABASE_URL",
+    "SUPABASE_SECRET_KEY",
+    "SUPABASE_PUBLISHABLE_KEY",
+    "GEMINI_API_KEY",
+):
+    os.environ.setdefault(_name, "test")
@@ -0,0 +1,91 @@
+"""Duplicate detection against real-world post pairs.
+
+These pairs are what NEAR_DUPLICATE_DISTANCE was tuned on; add new misfires here.
+"""
+import itertools
+
+import pytest
+
+from app.services.dedup import NEAR_DUPLICATE_DISTANCE, DuplicateIndex, _tokens, simhash
+
+# Weekly announcements; {day} is the only thing that changes between recurrences
+RECURRING = [
+    "#unipulse #sports Weekly Frisbee Night! Join us at the Sports Hall on {day} Oct, 7pm to 9pm. All skill levels welcome, discs provided. Free snacks after the game!",
+    "#unipulse #ai AI Reading Group: this week we're discussing diffusion models. {day} Oct, 6.30pm at COM1 Seminar Room 2. Bring your laptop and questions, dinner provided.",
+    "#unipulse #music Open Mic Night at the UTown Auditorium, {day} Oct from 8pm. Sign up at the door to perform, or just come and enjoy the music with friends. Free entry!",
+    "#unipulse #career Resume clinic with alumni from top tech firms. {day} Oct, 2pm to 5pm, Career Centre Level 3. Slots are limited so register early via the link in bio.",
+    "#unipulse #volunteer Beach cleanup at East Coast Park on {day} Oct, meet 8am at carpark C2. Gloves and bags provided. Please bring water and sunscreen!",
+    "#unipulse #food Hall bake sale this {day} Oct at the Temasek Hall foyer, 11am to 3pm. Cookies, brownies and cupcakes, all proceeds go to charity.",
+    "#unipulse #tech Hack Night: build anything in 4 hours. {day} Oct, 7pm at the Innovation Lab. Pizza and drinks on us, mentors on site to help.",
+    "#unipulse #arts Life drawing session, {day} Oct 5pm at the Arts Centre studio 1. Materials provided, beginners very welcome. Limited to 20 people.",
+    "#unipulse #chess Chess club weekly meetup, {day} Oct 7.30pm at the Central Library level 4 discussion room. Casual and rated games, boards provided.",
+    "#unipulse #fitness Sunrise yoga on the field, {day} Oct at 6.45am. Bring your own mat, we'll provide water. Suitable for all levels, no experience needed.",
+]
+DAYS = [1, 3, 8, 10, 15, 17, 22, 24, 29, 31]
+
+# (post, original phrase, edited phrase): the same announcement reposted with a small edit
+EDITS = [
+    (0, "Free snacks", "Free pizza"),
+    (0, "All skill levels welcome", "Everyone welcome"),
+    (1, "dinner provided", "dinner provided 🍕"),
+    (1, "Bring your laptop and questions", "Bring your laptop"),
+    (2, "Free entry!", "Free entry, see you there!"),
+    (3, "register early via the link in bio", "register early"),
+    (4, "Please bring water and sunscreen!", "Please bring water, sunscreen and a hat!"),
+    (5, "all proceeds go to charity", "all proceeds go to the children's charity"),
+    (6, "Pizza and drinks on us", "Pizza on us"),
+    (7, "beginners very welcome", "beginners welcome"),
+    (8, "Casual and rated games", "Casual games"),
+    (9, "no experience needed", "no experience required"),
+]
+
+
+def _distance(a: str, b: str) -> int:
+    return bin(simhash(_tokens(a)) ^ simhash(_tokens(b))).count("1")
+
+
+def _index(*texts: str) -> DuplicateIndex:
+    index = DuplicateIndex()
+    for i, text in enumerate(texts):
+        index.add(f"event-{i}", text)
+    return index
+
+
+@pytest.mark.parametrize("post,old,new", EDITS)
+def test_small_edit_is_near_duplicate(post, old, new):
+    original = RECURRING[post].format(day=10)
+    edited = original.replace(old, new)
+    assert _distance(original, edited) <= NEAR_DUPLICATE_DISTANCE
+    assert _index(original).find(edited) == "event-0"
+
+
+@pytest.mark.parametrize("template", RECURRING)
+def test_recurring_post_with_new_date_is_not_duplicate(template):
+    for a, b in itertools.combinations(DAYS, 2):
+        assert _index(template.format(day=a)).find(template.format(day=b)) is None
+
+
+def test_new_month_is_not_duplicate():
+    post = RECURRING[0].format(day=10)
+    assert _index(post).find(post.replace("Oct", "Nov")) is None
+
+
+def test_unrelated_posts_are_far_apart():
+    posts = [template.format(day=10) for template in RECURRING]
+    for a, b in itertools.combinations(posts, 2):
+        assert _distance(a, b) > NEAR_DUPLICATE_DISTANCE
+    index = _index(*posts[:-1])
+    assert index.find(posts[-1]) is None
+
+
+def test_exact_repost_ignores_case_and_spacing():
+    post = RECURRING[3].format(day=8)
+    assert _index(post).find("  " + post.upper() + "!!") == "event-0"
+
+
+def test_removed_event_no_longer_matches():
+    post = RECURRING[2].format(day=15)
+    index = _index(post)
+    index.remove("event-0")
+    assert index.find(post) is None
+    assert len(index) == 0
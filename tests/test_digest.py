@@ -0,0 +1,45 @@
+"""Mapping an account's newsletter_time onto the catch-up window it was loaded for."""
+from datetime import datetime
+
+import pytest
+
+from app.config import SGT
+from app.jobs.digest import _slot_for
+
+
+def _at(day: int, hour: int, minute: int) -> datetime:
+    return datetime(2025, 10, day, hour, minute, tzinfo=SGT)
+
+
+@pytest.mark.parametrize("newsletter_time, expected", [
+    ("09:00:00", _at(14, 9, 0)),  # First slot
+    ("09:03:00", _at(14, 9, 3)),
+    ("09:05:00", _at(14, 9, 5)),  # Last slot
+])
+def test_slot_within_same_day_window(newsletter_time, expected):
+    assert _slot_for(newsletter_time, _at(14, 9, 0), _at(14, 9, 5)) == expected
+
+
+@pytest.mark.parametrize("newsletter_time, expected", [
+    ("23:58:00", _at(14, 23, 58)),  # First slot
+    ("23:59:00", _at(14, 23, 59)),
+    ("00:00:00", _at(15, 0, 0)),  # Midnight belongs to the next day
+    ("00:02:00", _at(15, 0, 2)),  # Last slot
+])
+def test_slot_within_window_wrapping_midnight(newsletter_time, expected):
+    assert _slot_for(newsletter_time, _at(14, 23, 58), _at(15, 0, 2)) == expected
+
+
+def test_single_minute_window():
+    assert _slot_for("07:30:00", _at(14, 7, 30), _at(14, 7, 30)) == _at(14, 7, 30)
+
+
+@pytest.mark.parametrize("newsletter_time, expected", [
+    ("10:00:00", _at(14, 10, 0)),  # First slot
+    ("10:01:00", _at(14, 10, 1)),
+    ("00:00:00", _at(15, 0, 0)),  # Before first_slot's time of day, so after midnight
+    ("09:00:00", _at(15, 9, 0)),  # Last slot
+])
+def test_slot_within_full_catch_up_window(newsletter_time, expected):
+    # MAX_CATCHUP-sized window: 23 hours ending just before first_slot's time of day
+    assert _slot_for(newsletter_time, _at(14, 10, 0), _at(15, 9, 0)) == expected
@@ -0,0 +1,73 @@
+"""GCRA buckets: burst size, refill pace and per-key isolation, on a fake clock."""
+import pytest
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import RULES, allow
+
+# 10 per minute: a burst of 10, then one request every 6 seconds
+FIND = RULES["find"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    monkeypatch.setattr(rate_limit, "_tat", {})
+    monkeypatch.setattr(rate_limit, "_dirty", set())
+    return now
+
+
+def _burst(tele_id: int = 1, rule: str = "find") -> int:
+    """Requests allowed back to back before the first rejection."""
+    allowed = 0
+    while allow(tele_id, rule):
+        allowed += 1
+        assert allowed <= 1000, "bucket never filled"
+    return allowed
+
+
+def test_full_burst_then_rejected(clock):
+    assert FIND.interval == 6
+    assert _burst() == FIND.limit
+
+
+def test_tat_advances_one_interval_per_request(clock):
+    start = clock[0]
+    for n in range(1, 4):
+        assert allow(1, "find")
+        assert rate_limit._tat["1:find"] == start + n * FIND.interval
+
+
+def test_rejection_leaves_tat_unchanged(clock):
+    _burst()
+    tat = rate_limit._tat["1:find"]
+    assert not allow(1, "find")
+    assert rate_limit._tat["1:find"] == tat
+
+
+def test_one_request_per_interval_after_burst(clock):
+    _burst()
+    clock[0] += FIND.interval - 0.01
+    assert not allow(1, "find")
+    clock[0] += 0.01
+    assert allow(1, "find")
+    assert not allow(1, "find")
+
+
+def test_idle_bucket_refills_to_burst_not_beyond(clock):
+    _burst()
+    clock[0] += FIND.period * 10
+    assert _burst() == FIND.limit
+
+
+def test_partial_refill(clock):
+    _burst()
+    clock[0] += 3 * FIND.interval
+    assert _burst() == 3
+
+
+def test_buckets_are_per_user_and_rule(clock):
+    _burst(tele_id=1)
+    assert allow(2, "find")
+    assert allow(1, "events")
+    assert rate_limit._dirty == {"1:find", "2:find", "1:events"}
@@ -0,0 +1,119 @@
+"""BM25 ranking and rebuilds of the in-process /find index."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import search_index
+from app.services.search_index import SearchIndex
+
+
+def _event(event_id: str, title: str, text: str = "", days: int = 3, **fields) -> dict:
+    date = datetime.now(timezone.utc) + timedelta(days=days)
+    return {"event_id": event_id, "title": title, "text": text, "date": date.isoformat(), **fields}
+
+
+def _index(*events: tuple[dict, list[str]]) -> SearchIndex:
+    index = SearchIndex()
+    for event, categories in events:
+        index.upsert(event, categories)
+    return index
+
+
+def test_title_match_outranks_text_match():
+    index = _index(
+        (_event("text", "Games night", "Bring a frisbee"), ["social"]),
+        (_event("title", "Frisbee jam", "Games and snacks"), ["sports"]),
+    )
+    assert index.search("frisbee") == ["title", "text"]
+
+
+def test_rare_term_outweighs_common_one():
+    index = _index(
+        (_event("common-1", "Hall dinner"), []),
+        (_event("common-2", "Hall movie night"), []),
+        (_event("rare", "Robotics workshop"), []),
+    )
+    assert index.search("hall robotics")[0] == "rare"
+
+
+def test_more_matched_terms_rank_higher():
+    index = _index(
+        (_event("one", "Chess club"), []),
+        (_event("both", "Chess club rated games"), []),
+    )
+    assert index.search("chess rated") == ["both", "one"]
+
+
+def test_category_filter_and_listing():
+    index = _index(
+        (_event("later", "Frisbee", days=5), ["sports"]),
+        (_event("sooner", "Yoga", days=1), ["Sports"]),
+        (_event("other", "Frisbee", days=2), ["social"]),
+    )
+    assert index.search("frisbee", category="sports") == ["later"]
+    assert index.search(category="SPORTS") == ["sooner", "later"]
+
+
+def test_past_and_deleted_events_are_not_indexed():
+    index = _index(
+        (_event("past", "Frisbee", days=-1), []),
+        (_event("deleted", "Frisbee", is_deleted=True), []),
+    )
+    assert index.search("frisbee") == []
+    assert len(index) == 0
+
+
+def test_reindex_keeps_categories_and_poster():
+    index = _index((_event("a", "Frisbee", event_images=[{"url": "poster.jpg"}]), ["sports"]))
+    index.upsert(_event("a", "Ultimate frisbee"))
+    assert index.search("ultimate", category="sports") == ["a"]
+    assert index.get("a")["event_images"] == [{"url": "poster.jpg"}]
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(search_index, "index", SearchIndex())
+    monkeypatch.setattr(search_index, "_loaded", False)
+    return search_index.index
+
+
+def test_rebuild_replays_changes_made_during_load(fresh_index, monkeypatch):
+    search_index.index_event(_event("deleted", "Quiz night"), ["social"])
+
+    async def snapshot(since):
+        # Writes land while the rebuild is still reading the DB
+        search_index.index_event(_event("created", "Frisbee jam"), ["sports"])
+        search_index.index_event(_event("edited", "Board games marathon"))
+        search_index.drop_event("deleted")
+        # The snapshot predates all three writes
+        return [
+            {"event": _event("edited", "Board games"), "categories": ["social"]},
+            {"event": _event("deleted", "Quiz night"), "categories": ["social"]},
+            {"event": _event("kept", "Chess club"), "categories": ["social"]},
+        ]
+
+    monkeypatch.setattr(search_index, "get_upcoming_events_for_index", snapshot)
+    asyncio.run(search_index.load_search_index())
+
+    assert search_index.is_ready()
+    assert search_index._journal is None
+    assert sorted(fresh_index.search(category="social")) == ["edited", "kept"]
+    assert fresh_index.search("marathon") == ["edited"]
+    assert fresh_index.search("frisbee", category="sports") == ["created"]
+    assert fresh_index.get("deleted") is None
+
+
+def test_failed_rebuild_keeps_index_and_stops_journaling(fresh_index, monkeypatch):
+    search_index.index_event(_event("a", "Frisbee"), ["sports"])
+
+    async def unavailable(since):
+        raise ConnectionError("db down")
+
+    monkeypatch.setattr(search_index, "get_upcoming_events_for_index", unavailable)
+    with pytest.raises(ConnectionError):
+        asyncio.run(search_index.load_search_index())
+
+    assert search_index._journal is None
+    assert not search_index.is_ready()
+    assert fresh_index.search("frisbee") == ["a"]